@@ -1,3 +1,40 @@
-import processing
-import dist_plotting
-import geo_plotting
+"""Reusable data science functions.
+
+The submodules are loaded lazily, on first attribute access (e.g.
+`dsfuncs.processing`), so that importing the package doesn't import
+the heavy dependencies of the submodules that aren't used. In
+particular, `processing` only needs numpy, while the plotting
+submodules pull in matplotlib, seaborn, pandas, fiona, and Basemap.
+"""
+
+import importlib
+import sys
+import types
+
+_submodules = ('processing', 'dist_summary', 'instrumentation',
+        'dist_plotting', 'geometry', 'projection', 'spatial', 'geo_plotting',
+        'report')
+
+class _LazyModule(types.ModuleType):
+    """Package module that imports its submodules on first access."""
+
+    def __getattr__(self, name):
+        if name not in _submodules:
+            raise AttributeError("module '{0}' has no attribute '{1}'".format(
+                self.__name__, name))
+
+        submodule = importlib.import_module('.' + name, self.__name__)
+        setattr(self, name, submodule)
+        return submodule
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_submodules))
+
+_lazy_module = _LazyModule(__name__, __doc__)
+_lazy_module.__dict__.update(dict((name, value) for name, value
+    in globals().items() if name.startswith('__') and name != '__doc__'))
+_lazy_module.__all__ = list(_submodules)
+# Keep a reference to the original module, whose globals would otherwise
+# be cleared once it's garbage collected (in Python 2).
+_lazy_module._original_module = sys.modules[__name__]
+sys.modules[__name__] = _lazy_module
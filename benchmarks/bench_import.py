@@ -0,0 +1,109 @@
+"""Benchmark the cost of importing the package and its submodules.
+
+Import the package (and then each of a list of its submodules) in a
+fresh interpreter, and print the wall time each import takes, along
+with the heavy dependencies it pulled in. Since the submodules are
+loaded lazily, importing the package itself (or only `processing`)
+shouldn't pull in any of them - if it does, or takes longer than
+`--max_seconds`, the benchmark exits with an error, so that it can
+guard the startup cost of lightweight workers. Imports that fail (e.g.
+of a plotting submodule whose dependencies aren't installed) are
+reported separately, and are only errors for the lightweight imports.
+
+Usage:
+    python benchmarks/bench_import.py --max_seconds 0.5
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ('pandas', 'matplotlib', 'seaborn', 'fiona',
+        'mpl_toolkits.basemap')
+# The imports that shouldn't pull in any of the heavy modules.
+LIGHT_IMPORTS = ('', 'processing')
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.time()
+import {module}
+seconds = time.time() - start
+print(json.dumps({{'seconds': seconds, 'heavy_modules': [name for name in
+    {heavy_modules!r} if name in sys.modules]}}))
+"""
+
+def time_import(package_dir, module, n_repeats):
+    """Time an import in fresh interpreters, returning the best of `n_repeats`.
+
+    Args:
+        package_dir: str
+            Holds the directory of the package.
+        module: str
+            Holds the submodule to import, or '' for the package.
+        n_repeats: int
+
+    Returns:
+        seconds: float
+        heavy_modules: list of strs
+            Holds the heavy modules that were imported along with it.
+    """
+
+    package_name = os.path.basename(package_dir)
+    module_name = package_name + ('.' + module if module else '')
+    script = IMPORT_SCRIPT.format(module=module_name,
+            heavy_modules=HEAVY_MODULES)
+
+    results = []
+    for _ in range(n_repeats):
+        output = subprocess.check_output([sys.executable, '-c', script],
+                cwd=os.path.dirname(package_dir))
+        results.append(json.loads(output.decode('utf-8').strip()
+            .splitlines()[-1]))
+
+    return min(result['seconds'] for result in results), \
+            results[0]['heavy_modules']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--modules', nargs='*', default=['', 'processing',
+        'dist_plotting', 'geo_plotting'])
+    parser.add_argument('--max_seconds', type=float, default=0.5)
+    parser.add_argument('--n_repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__)))
+
+    failures = []
+    import_errors = []
+    print('{0:>14} {1:>10}  {2}'.format('module', 'seconds',
+        'heavy modules'))
+    for module in args.modules:
+        try:
+            seconds, heavy_modules = time_import(package_dir, module,
+                    args.n_repeats)
+        except subprocess.CalledProcessError:
+            print('{0:>14} {1:>10}'.format(module or '(package)', 'failed'))
+            import_errors.append(module)
+            continue
+        print('{0:>14} {1:>10.3f}  {2}'.format(module or '(package)',
+            seconds, ', '.join(heavy_modules)))
+        if module in LIGHT_IMPORTS and (heavy_modules or
+                seconds > args.max_seconds):
+            failures.append(module)
+
+    if import_errors:
+        print('Imports that failed: {0}'.format(', '.join(
+            module or '(package)' for module in import_errors)))
+    if failures:
+        print('Imports over budget: {0}'.format(', '.join(
+            module or '(package)' for module in failures)))
+    if failures or set(import_errors) & set(LIGHT_IMPORTS):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark the scaling of `remove_outliers` across processes.
+
+Time `remove_outliers` on synthetic data (heavy tailed, so that
+there are actually outliers to remove) with `n_jobs` going from 1
+up to the number of available cores, and print the wall time and
+speedup over a single process for each.
+
+Usage:
+    python benchmarks/bench_remove_outliers.py --n_obs 100000000
+"""
+
+from __future__ import print_function
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+from processing import remove_outliers
+
+def time_remove_outliers(data, n_jobs, method, n_repeats):
+    """Time `remove_outliers`, returning the best of `n_repeats` runs.
+
+    Args:
+        data: 1d numpy.ndarray
+        n_jobs: int
+        method: str
+        n_repeats: int
+    """
+
+    times = []
+    for _ in range(n_repeats):
+        start = time.time()
+        remove_outliers(data, method=method, approx=method != 'std',
+                n_jobs=n_jobs)
+        times.append(time.time() - start)
+
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--n_obs', type=int, default=10 ** 7)
+    parser.add_argument('--max_jobs', type=int,
+            default=multiprocessing.cpu_count())
+    parser.add_argument('--method', default='std')
+    parser.add_argument('--n_repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    data = np.random.RandomState(0).standard_t(3, size=args.n_obs)
+
+    n_jobs_lst = [1]
+    while n_jobs_lst[-1] * 2 <= args.max_jobs:
+        n_jobs_lst.append(n_jobs_lst[-1] * 2)
+    if n_jobs_lst[-1] != args.max_jobs:
+        n_jobs_lst.append(args.max_jobs)
+
+    print('{0:>8} {1:>10} {2:>8}'.format('n_jobs', 'seconds', 'speedup'))
+    for n_jobs in n_jobs_lst:
+        seconds = time_remove_outliers(data, n_jobs, args.method,
+                args.n_repeats)
+        if n_jobs == 1:
+            base_seconds = seconds
+        print('{0:>8} {1:>10.3f} {2:>8.2f}'.format(n_jobs, seconds,
+            base_seconds / seconds))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""Run the benchmark suite, and store or compare its results.
+
+The suite is made of the `suite_*.py` modules in this directory, in
+the style of asv (airspeed velocity), but runnable offline with no
+extra dependencies. Each class in them is a benchmark, optionally
+parameterized by a `params` list. Its `setup` (and `teardown`) are
+called with each param, and each of its `time_*` methods is run
+`--n_repeats` times, recording the best wall time, and then once
+more under tracemalloc, recording the peak memory allocated by the
+call (numpy's allocations included). A benchmark that raises is
+recorded (with its error) as failed, and the rest of the suite still
+runs.
+
+Results are saved to results/<commit>.json (with a -dirty suffix if
+the tree has uncommitted changes), and can be compared against those
+of another commit with `--compare`.
+
+Usage:
+    python benchmarks/run_suite.py --bench RemoveOutliers
+    python benchmarks/run_suite.py --compare HEAD~1
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import gc
+import glob
+import importlib
+import inspect
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import traceback
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+
+def find_benchmarks(bench_regex=None):
+    """Find the benchmark classes of the suite.
+
+    Args:
+        bench_regex (optional): str
+            Holds a regex that the `<module>.<class>` name of a
+            benchmark must match (anywhere) to be included.
+
+    Returns:
+        list of (name, class) tuples.
+    """
+
+    if BENCHMARK_DIR not in sys.path:
+        sys.path.insert(0, BENCHMARK_DIR)
+
+    benchmarks = []
+    for path in sorted(glob.glob(os.path.join(BENCHMARK_DIR, 'suite_*.py'))):
+        module_name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            print('Skipping {0}: {1}'.format(module_name, e), file=sys.stderr)
+            continue
+        for class_name, cls in sorted(vars(module).items()):
+            name = '{0}.{1}'.format(module_name, class_name)
+            if class_name.startswith('_') or not inspect.isclass(cls) or \
+                    cls.__module__ != module_name:
+                continue
+            if bench_regex and not re.search(bench_regex, name):
+                continue
+            benchmarks.append((name, cls))
+
+    return benchmarks
+
+def run_benchmark(cls, n_repeats):
+    """Run every `time_*` method of a benchmark class, for each param.
+
+    Args:
+        cls: class
+        n_repeats: int
+
+    Returns:
+        dict of `<method>(<param>)` name to a dict of its 'seconds'
+        and 'peak_bytes' - or of its 'error', if it (or the setup for
+        its param) raised.
+    """
+
+    params = getattr(cls, 'params', None)
+    param_lst = [(param,) for param in params] if params else [()]
+    methods = sorted(name for name in dir(cls) if name.startswith('time_'))
+
+    results = {}
+    for param in param_lst:
+        names = [method_name + ('({0})'.format(param[0]) if param else '')
+                for method_name in methods]
+        benchmark = cls()
+        try:
+            if hasattr(benchmark, 'setup'):
+                benchmark.setup(*param)
+        except Exception:
+            error = _format_error()
+            results.update((name, {'error': error}) for name in names)
+            continue
+
+        try:
+            for method_name, name in zip(methods, names):
+                method = getattr(benchmark, method_name)
+                try:
+                    results[name] = measure(method, param, n_repeats)
+                except Exception:
+                    results[name] = {'error': _format_error()}
+                    _close_figures()
+        finally:
+            if hasattr(benchmark, 'teardown'):
+                benchmark.teardown(*param)
+
+    return results
+
+def _format_error():
+    """Format the exception being handled, and print its traceback."""
+
+    traceback.print_exc(file=sys.stderr)
+    exc_type, exc_value = sys.exc_info()[:2]
+    return '{0}: {1}'.format(exc_type.__name__, exc_value)
+
+def measure(method, param, n_repeats):
+    """Measure the best wall time, and the peak memory, of a call.
+
+    Args:
+        method: callable
+        param: tuple
+        n_repeats: int
+    """
+
+    times = []
+    for _ in range(n_repeats):
+        gc.collect()
+        start = time.time()
+        method(*param)
+        times.append(time.time() - start)
+        _close_figures()
+
+    peak_bytes = None
+    if tracemalloc is not None:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            method(*param)
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        _close_figures()
+
+    return {'seconds': min(times), 'peak_bytes': peak_bytes}
+
+def _close_figures():
+    """Close any figures a benchmark opened (if it used pyplot)."""
+
+    if 'matplotlib.pyplot' in sys.modules:
+        sys.modules['matplotlib.pyplot'].close('all')
+
+def git_commit(ref='HEAD'):
+    """Return the short hash of a commit of the repo (or 'unknown').
+
+    Args:
+        ref (optional): str
+    """
+
+    repo_dir = os.path.dirname(BENCHMARK_DIR)
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short',
+            ref], cwd=repo_dir).decode('utf-8').strip()
+        if ref == 'HEAD' and subprocess.check_output(['git', 'status',
+            '--porcelain', '--untracked-files=no'], cwd=repo_dir).strip():
+            commit += '-dirty'
+    except (OSError, subprocess.CalledProcessError):
+        commit = 'unknown'
+
+    return commit
+
+def load_results(ref):
+    """Load the stored results of a commit (or a results file path).
+
+    Args:
+        ref: str
+    """
+
+    path = ref if os.path.exists(ref) else os.path.join(RESULTS_DIR,
+            '{0}.json'.format(git_commit(ref)))
+    with open(path) as results_file:
+        return json.load(results_file)['benchmarks']
+
+def print_results(results, baseline=None):
+    """Print a table of results, with ratios to a baseline if given.
+
+    Args:
+        results: dict
+        baseline (optional): dict
+    """
+
+    header = '{0:<72} {1:>10} {2:>10}'.format('benchmark', 'seconds',
+            'peak MB')
+    if baseline is not None:
+        header += ' {0:>8} {1:>8}'.format('time x', 'mem x')
+    print(header)
+
+    for name in sorted(results):
+        result = results[name]
+        if 'error' in result:
+            print('{0:<72} failed: {1}'.format(name, result['error']))
+            continue
+        peak_mb = result['peak_bytes'] / 2. ** 20 if result['peak_bytes'] \
+                is not None else float('nan')
+        line = '{0:<72} {1:>10.4f} {2:>10.1f}'.format(name,
+                result['seconds'], peak_mb)
+        if baseline is not None and 'seconds' in baseline.get(name, {}):
+            old = baseline[name]
+            line += ' {0:>8.2f} {1:>8.2f}'.format(
+                    result['seconds'] / old['seconds'],
+                    (result['peak_bytes'] or np.nan) /
+                        (old['peak_bytes'] or np.nan))
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--bench', default=None,
+            help='Regex of the benchmarks to run.')
+    parser.add_argument('--n_repeats', type=int, default=3)
+    parser.add_argument('--compare', default=None,
+            help='Commit (or results file) to compare against.')
+    parser.add_argument('--no_save', action='store_true')
+    args = parser.parse_args()
+
+    results = {}
+    for name, cls in find_benchmarks(args.bench):
+        print('Running {0}'.format(name), file=sys.stderr)
+        for method_name, result in run_benchmark(cls,
+                args.n_repeats).items():
+            results['{0}.{1}'.format(name, method_name)] = result
+
+    baseline = load_results(args.compare) if args.compare else None
+    print_results(results, baseline)
+
+    if not args.no_save:
+        if not os.path.isdir(RESULTS_DIR):
+            os.makedirs(RESULTS_DIR)
+        commit = git_commit()
+        results_path = os.path.join(RESULTS_DIR, '{0}.json'.format(commit))
+        # Merge with any results already stored for the commit (e.g.
+        # from a run of other benchmarks).
+        stored = {}
+        if os.path.exists(results_path):
+            with open(results_path) as results_file:
+                stored = json.load(results_file)['benchmarks']
+        stored.update(results)
+        with open(results_path, 'w') as results_file:
+            json.dump({'commit': commit,
+                'date': datetime.datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'numpy': np.__version__, 'machine': platform.machine(),
+                'benchmarks': stored}, results_file, indent=2,
+                sort_keys=True)
+        print('Saved results to {0}'.format(results_path), file=sys.stderr)
+
+    n_failed = sum('error' in result for result in results.values())
+    if n_failed:
+        print('{0} benchmark(s) failed.'.format(n_failed), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
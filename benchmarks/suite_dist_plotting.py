@@ -0,0 +1,57 @@
+"""Benchmarks of the `dist_plotting` hot paths."""
+
+import matplotlib.pyplot as plt
+
+from synthetic import load_package, make_categorical_frame, make_float_array
+
+package = load_package()
+dist_plotting = package.dist_plotting
+dist_summary = package.dist_summary
+
+class PlotVarDistContinuous(object):
+    """Plot the distribution of a large continuous variable."""
+
+    params = [10 ** 5, 10 ** 7]
+    param_names = ['n_obs']
+
+    def setup(self, n_obs):
+        self.data = make_float_array(n_obs)
+
+    def time_plot_var_dist(self, n_obs):
+        fig, ax = plt.subplots(1, 4)
+        dist_plotting.plot_var_dist(self.data, categorical=False, show=False,
+                ax=ax)
+
+    def time_summarize(self, n_obs):
+        dist_summary.DistributionSummary.from_data(self.data)
+
+class PlotVarDistCategorical(object):
+    """Plot the distribution of a high cardinality categorical variable."""
+
+    params = [100, 10 ** 4]
+    param_names = ['n_categories']
+
+    def setup(self, n_categories):
+        self.data = make_categorical_frame(10 ** 6, n_categories)['category']
+
+    def time_plot_var_dist(self, n_categories):
+        fig, ax = plt.subplots(1, 1)
+        dist_plotting.plot_var_dist(self.data, categorical=True, show=False,
+                ax=ax)
+
+class PlotBinaryResponse(object):
+    """Plot the response rate of each category of a large frame."""
+
+    params = [100, 10 ** 4]
+    param_names = ['n_categories']
+
+    def setup(self, n_categories):
+        self.df = make_categorical_frame(10 ** 6, n_categories)
+
+    def time_plot_binary_response(self, n_categories):
+        fig, ax = plt.subplots(1, 1)
+        dist_plotting.plot_binary_response(self.df, 'category', 'response',
+                show=False, ax=ax)
+
+    def time_calc_binary_responses(self, n_categories):
+        dist_plotting.calc_binary_responses(self.df, 'category', 'response')
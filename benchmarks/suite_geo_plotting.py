@@ -0,0 +1,80 @@
+"""Benchmarks of the `geo_plotting` hot paths, stage by stage."""
+
+import fiona
+import numpy as np
+
+from synthetic import cached_shapefile, load_package
+
+package = load_package()
+geo_plotting = package.geo_plotting
+spatial = package.spatial
+
+class _UnbuiltMapBuilder(geo_plotting.USMapBuilder):
+    """USMapBuilder that leaves the stages of the build to the caller."""
+
+    def _build_map(self, shapefile_path):
+        pass
+
+class BuildMap(object):
+    """Build a country, state, and county map from a synthetic shapefile."""
+
+    params = ['Country', 'State', 'County']
+    param_names = ['geo_level']
+    builder_kwargs = {'Country': {}, 'State': {'state_names': ['Texas']},
+            'County': {'state_names': ['Texas'], 'county_names':
+                ['County0', 'County1']}}
+
+    def setup(self, geo_level):
+        self.shapefile_path = cached_shapefile()
+        self.kwargs = dict(self.builder_kwargs[geo_level],
+                geo_level=geo_level, projection_backend='numpy')
+
+        # Build once, so that the attribute index exists.
+        self.builder = _UnbuiltMapBuilder(self.shapefile_path, **self.kwargs)
+        self.index = self.builder._load_index(self.shapefile_path)
+        with fiona.open(self.shapefile_path) as src:
+            self.builder._parse_paths(src, self.index)
+        self.builder._calc_bounds()
+        self.builder._calc_corners()
+
+    def time_build_map(self, geo_level):
+        geo_plotting.USMapBuilder(self.shapefile_path, **self.kwargs)
+
+    def time_parse_paths(self, geo_level):
+        with fiona.open(self.shapefile_path) as src:
+            self.builder._parse_paths(src, self.index)
+
+    def time_calc_bounds(self, geo_level):
+        self.builder._calc_bounds()
+
+    def time_create_and_plot_map(self, geo_level):
+        self.builder._create_map()
+        self.builder._plot_map()
+
+class Simplify(object):
+    """Simplify the country map to a typical screen resolution."""
+
+    def setup(self):
+        builder = _UnbuiltMapBuilder(cached_shapefile())
+        with fiona.open(cached_shapefile()) as src:
+            builder._parse_paths(src, builder._load_index(cached_shapefile()))
+        self.geometry = builder.geometry
+
+    def time_simplify(self):
+        self.geometry._simplified = {}
+        self.geometry.simplify(0.05)
+
+class SpatialJoin(object):
+    """Assign a million random points to the counties they fall in."""
+
+    def setup(self):
+        builder = _UnbuiltMapBuilder(cached_shapefile())
+        with fiona.open(cached_shapefile()) as src:
+            builder._parse_paths(src, builder._load_index(cached_shapefile()))
+        self.geometry = builder.geometry
+        rng = np.random.RandomState(0)
+        self.lngs = rng.uniform(-125, -66, 10 ** 6)
+        self.lats = rng.uniform(24, 50, 10 ** 6)
+
+    def time_spatial_join(self):
+        spatial.spatial_join(self.geometry, self.lngs, self.lats)
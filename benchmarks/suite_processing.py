@@ -0,0 +1,49 @@
+"""Benchmarks of the `processing` hot paths."""
+
+import numpy as np
+
+from synthetic import load_package, make_float_array
+
+processing = load_package().processing
+
+class RemoveOutliers(object):
+    """Remove outliers from a large float array, by each method."""
+
+    params = ['std', 'iqr', 'mad']
+    param_names = ['method']
+
+    def setup(self, method):
+        self.data = make_float_array(10 ** 7)
+
+    def time_remove_outliers(self, method):
+        processing.remove_outliers(self.data, method=method)
+
+    def time_remove_outliers_approx(self, method):
+        processing.remove_outliers(self.data, method=method, approx=True)
+
+    def time_remove_outliers_chunked(self, method):
+        out = np.empty_like(self.data)
+        processing.remove_outliers_chunked(self.data, method=method, out=out)
+
+class InlierMask(object):
+    """Mask the inliers of every column of a 2d array at once."""
+
+    def setup(self):
+        self.data = make_float_array(2 * 10 ** 6).reshape(-1, 20)
+
+    def time_inlier_mask(self):
+        processing.inlier_mask(self.data)
+
+    def time_inlier_mask_all(self):
+        processing.inlier_mask(self.data, how='all')
+
+class RemoveOutliersGrouped(object):
+    """Label outliers within each of many groups."""
+
+    def setup(self):
+        self.data = make_float_array(5 * 10 ** 6)
+        self.groups = np.random.RandomState(1).randint(10 ** 4,
+                size=self.data.shape[0])
+
+    def time_remove_outliers_grouped(self):
+        processing.remove_outliers_grouped(self.data, self.groups)
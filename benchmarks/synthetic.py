@@ -0,0 +1,179 @@
+"""Synthetic data for the benchmark suite.
+
+Every generator is seeded, so that the same data is benchmarked on
+every run (and every commit). The shapefile generator writes a grid
+of US-like states, each split into a grid of counties whose shared
+borders are made of exactly the same vertices (as in the census
+shapefiles), with STATEFP, NAME, and GEOID attributes.
+"""
+
+import importlib
+import os
+import sys
+
+import numpy as np
+
+# The FIPS codes of the contiguous states, plus Alaska and Hawaii.
+STATE_FIPS = ('01', '04', '05', '06', '08', '09', '10', '11', '12', '13',
+        '16', '17', '18', '19', '20', '21', '22', '23', '24', '25', '26',
+        '27', '28', '29', '30', '31', '32', '33', '34', '35', '36', '37',
+        '38', '39', '40', '41', '42', '44', '45', '46', '47', '48', '49',
+        '50', '51', '53', '54', '55', '56', '02', '15')
+
+def load_package():
+    """Import the package this benchmark directory belongs to."""
+
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__)))
+    if os.path.dirname(package_dir) not in sys.path:
+        sys.path.insert(0, os.path.dirname(package_dir))
+
+    return importlib.import_module(os.path.basename(package_dir))
+
+def make_float_array(n_obs, seed=0):
+    """Make a heavy tailed float array (so that it has outliers).
+
+    Args:
+        n_obs: int
+        seed (optional): int
+    """
+
+    return np.random.RandomState(seed).standard_t(3, size=n_obs)
+
+def make_categorical_frame(n_rows, n_categories, seed=0):
+    """Make a frame of a high cardinality categorical and a binary response.
+
+    Category frequencies follow a Zipf-like distribution, and each
+    category has its own response rate.
+
+    Args:
+        n_rows: int
+        n_categories: int
+        seed (optional): int
+
+    Returns:
+        Pandas DataFrame with 'category', 'value' and 'response'
+        columns.
+    """
+
+    import pandas as pd
+
+    rng = np.random.RandomState(seed)
+    weights = 1. / np.arange(1, n_categories + 1)
+    category_idx = rng.choice(n_categories, size=n_rows,
+            p=weights / weights.sum())
+    response_rates = rng.uniform(0.05, 0.5, size=n_categories)
+
+    categories = np.array(['category_{0}'.format(idx) for idx
+        in range(n_categories)], dtype=object)
+    return pd.DataFrame({'category': categories[category_idx],
+        'value': rng.standard_t(3, size=n_rows),
+        'response': rng.uniform(size=n_rows) <
+            response_rates[category_idx]})
+
+def make_shapefile(path, counties_per_side=8, vertices_per_edge=20,
+        n_states_wide=10):
+    """Write a synthetic, US-like shapefile of county polygons.
+
+    The states are laid out on a grid covering the lng/lat box of the
+    contiguous US, and each is split into counties_per_side ** 2
+    counties. Each county edge has `vertices_per_edge` vertices (with
+    a small wiggle, so that simplification has something to remove),
+    computed from the grid the same way for both counties that share
+    it.
+
+    Args:
+        path: str
+        counties_per_side (optional): int
+        vertices_per_edge (optional): int
+        n_states_wide (optional): int
+
+    Returns:
+        The number of polygons written.
+    """
+
+    import fiona
+
+    n_states_high = int(np.ceil(len(STATE_FIPS) / float(n_states_wide)))
+    n_cols = n_states_wide * counties_per_side
+    n_rows = n_states_high * counties_per_side
+    lng_min, lat_min, lng_max, lat_max = -124., 25., -67., 49.
+    cell_width = (lng_max - lng_min) / n_cols
+    cell_height = (lat_max - lat_min) / n_rows
+    steps = np.arange(vertices_per_edge) / float(vertices_per_edge)
+
+    def edge(col_0, row_0, col_1, row_1):
+        """Vertices from grid point 0 towards 1, excluding 1."""
+
+        lngs = lng_min + (col_0 + (col_1 - col_0) * steps) * cell_width
+        lats = lat_min + (row_0 + (row_1 - row_0) * steps) * cell_height
+        wiggle = 0.05 * np.sin(np.pi * steps * 7)
+        if row_0 == row_1:
+            lats = lats + wiggle * cell_height
+        else:
+            lngs = lngs + wiggle * cell_width
+        return np.column_stack([lngs, lats])
+
+    def corner(col, row):
+        """The vertex at a grid point."""
+
+        return edge(col, row, col + 1, row)[0]
+
+    def reverse(edge_coords, end):
+        """The same edge traversed from its end, excluding its start."""
+
+        return np.vstack([[end], edge_coords[:0:-1]])
+
+    schema = {'geometry': 'Polygon', 'properties': {'STATEFP': 'str',
+        'NAME': 'str', 'GEOID': 'str'}}
+    n_polygons = 0
+    with fiona.open(path, 'w', driver='ESRI Shapefile', schema=schema) \
+            as dst:
+        for state_idx, state_fips in enumerate(STATE_FIPS):
+            state_col = (state_idx % n_states_wide) * counties_per_side
+            state_row = (state_idx // n_states_wide) * counties_per_side
+            for county_idx in range(counties_per_side ** 2):
+                col = state_col + county_idx % counties_per_side
+                row = state_row + county_idx // counties_per_side
+                # Every edge is built left to right or bottom to top,
+                # so the top and left edges (the bottom and right edges
+                # of neighbors) are traversed in reverse.
+                ring = np.vstack([edge(col, row, col + 1, row),
+                    edge(col + 1, row, col + 1, row + 1),
+                    reverse(edge(col, row + 1, col + 1, row + 1),
+                        corner(col + 1, row + 1)),
+                    reverse(edge(col, row, col, row + 1),
+                        corner(col, row + 1)),
+                    corner(col, row)[np.newaxis]])
+                dst.write({'geometry': {'type': 'Polygon',
+                    'coordinates': [ring.tolist()]},
+                    'properties': {'STATEFP': state_fips,
+                        'NAME': 'County{0}'.format(county_idx),
+                        'GEOID': '{0}{1:03d}'.format(state_fips,
+                            county_idx)}})
+                n_polygons += 1
+
+    return n_polygons
+
+def cached_shapefile(counties_per_side=8, vertices_per_edge=20):
+    """Return the path of a synthetic shapefile, writing it if need be.
+
+    The shapefile is kept in the temp directory between runs, since
+    writing it takes longer than most of the benchmarks that use it.
+
+    Args:
+        counties_per_side (optional): int
+        vertices_per_edge (optional): int
+    """
+
+    import tempfile
+
+    shapefile_dir = os.path.join(tempfile.gettempdir(), 'dsfuncs_bench')
+    path = os.path.join(shapefile_dir, 'counties_{0}_{1}.shp'.format(
+        counties_per_side, vertices_per_edge))
+    if not os.path.exists(path):
+        if not os.path.isdir(shapefile_dir):
+            os.makedirs(shapefile_dir)
+        make_shapefile(path, counties_per_side, vertices_per_edge)
+
+    return path
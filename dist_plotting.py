@@ -12,25 +12,71 @@ it creates 4 plots - a box and then hist/kde with and without outliers.
 The latter creates a bar plot for a categorical variable, with 
 the heights equal to the percentage of each category, but with the  
 bar text equal to percentage of True's in a response variable. 
+
+For large continuous variables (more than `large_n_threshold` obs.), 
+the data is binned once onto a fine grid, and the histogram, a KDE 
+(the binned counts convolved with a Gaussian kernel via an FFT), and 
+the box plot statistics are all rendered from summaries rather than 
+from the raw data. `plot_var_dist` can also be passed a 
+`DistributionSummary` in place of the raw data, in which case 
+everything is rendered from the summary. 
+
+Both `plot_var_dist` and `plot_binary_response` (and 
+`calc_binary_responses`) also take the path of a CSV/Parquet file, or 
+an iterator of DataFrame chunks, in place of the data. Only the needed 
+columns are read, a chunk at a time, into a summary (or counts) that 
+the plots are rendered from, so memory use doesn't grow with the size 
+of the file. 
+
+`calc_binary_responses` calculates the counts that 
+`plot_binary_response` plots, for one or many categorical variables 
+at once. Its output can be passed back into `plot_binary_response`, 
+so that the counts can be calculated upstream (or ahead of time). 
+
+Both `plot_var_dist` and `plot_binary_response` can be instrumented, 
+by passing in an `instrumentation.CallStats` as their `stats`. 
 """
 
 import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection, PathCollection
+from matplotlib.font_manager import FontProperties
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
 import seaborn as sns
+import numpy as np
 import pandas as pd
-from itertools import izip
 
-from .processing import remove_outliers
+from .processing import remove_outliers, select_quantiles, QuantileSketch
+from .dist_summary import DistributionSummary, read_chunks, \
+        is_chunked_source
+from .instrumentation import CallStats, count_artists
+
+# Holds the number of fine (KDE) bins per histogram bin that large 
+# continuous variables are binned into. 
+KDE_BINS_PER_BIN = 32
+# Holds the number of categories above which only the top categories 
+# (and an "other" bucket) of a categorical variable are plotted. 
+TOP_K_CATEGORIES = 30
 
 def plot_var_dist(var_data, categorical, show=True, ax=None,
-        outliers=True): 
+        outliers=True, bins=20, large_n_threshold=10 ** 6, 
+        approx_quantiles=False, top_k=None, stats=None, column=None, 
+        chunk_size=10 ** 6): 
     """Plot the distribution of the inputted variable data. 
 
     Given the inputted data, plot the distribution of the data
     by calling the relevant function (continuous or categorical). 
 
     Args: 
-        var_data: 1d numpy.ndarray
+        var_data: 1d numpy.ndarray, DistributionSummary, str, or 
+        iterator of chunks
+            If the path of a CSV/Parquet file, or a one-shot iterator 
+            (e.g. a generator) of chunks of the data, is passed in, 
+            it's read a chunk at a time into a DistributionSummary, 
+            which is plotted. 
         categorical: bool
+            Ignored if a DistributionSummary is passed in, since 
+            it knows whether it's categorical. 
         show (optional): bool 
             Whether or not to show the plot. Defaults to True. 
         ax (optional): matplotlib.pylot.Axes object(s)
@@ -43,29 +89,120 @@ def plot_var_dist(var_data, categorical, show=True, ax=None,
             Whether or not to plot both with and without outliers. 
             If false, only plot the raw data passed in, and don't
             plot it with outliers removed. 
+        bins (optional): int
+            Number of bins to use for the histogram of a continuous 
+            variable. 
+        large_n_threshold (optional): int
+            Number of obs. above which a continuous variable is 
+            plotted from binned summaries rather than the raw data 
+            (see `_plot_binned_continuous_var_dist`). If None, the raw 
+            data is always used. 
+        approx_quantiles (optional): bool
+            Whether to calculate the box plot statistics of large 
+            continuous variables from a `QuantileSketch` rather than 
+            exactly. 
+        top_k (optional): int
+            Number of the most common categories of a categorical 
+            variable to plot, with the rest aggregated into an "other" 
+            bar. If None, this is only done for variables with more 
+            than `TOP_K_CATEGORIES` categories. 
+        stats (optional): instrumentation.CallStats
+            Holds stats to record the 'plot' and 'show' stages of the 
+            call in, along with the number of obs. and artists drawn. 
+            Reading a file (or chunks) is recorded as a 'summarize' 
+            stage. 
+        column (optional): str
+            Holds the column of the file (or of the DataFrame chunks) 
+            to plot. Needed if `var_data` is a file path. 
+        chunk_size (optional): int
+            Number of rows to read from a file at a time. 
+    """
+
+    stats = CallStats() if stats is None else stats
+    stats.begin('plot_var_dist')
+
+    try: 
+        if is_chunked_source(var_data): 
+            with stats.stage('summarize') as stage: 
+                var_data = _summarize_chunks(var_data, categorical, column, 
+                        chunk_size)
+                stage.counts['n_obs'] = var_data.n
+
+        with stats.stage('plot') as stage: 
+            if isinstance(var_data, DistributionSummary): 
+                categorical = var_data.categorical
+                stage.counts['n_obs'] = var_data.n
+            else: 
+                stage.counts['n_obs'] = len(var_data)
+
+            if not categorical: 
+                ax = _plot_continuous_var_dist(var_data, ax, False, 
+                        outliers, bins, large_n_threshold, approx_quantiles)
+            else: 
+                ax = _plot_categorical_var_dist(var_data, ax, False, top_k)
+            stage.counts['n_artists'] = count_artists(np.ravel(ax))
+
+        if show: 
+            with stats.stage('show'): 
+                plt.show()
+    finally: 
+        stats.finish()
+
+def _summarize_chunks(source, categorical, column=None, chunk_size=10 ** 6): 
+    """Summarize a variable read a chunk at a time. 
+
+    Args: 
+        source: str or iterator of chunks
+            See `plot_var_dist`. 
+        categorical: bool
+        column (optional): str
+        chunk_size (optional): int
+
+    Returns: 
+        DistributionSummary
     """
 
-    if not categorical: 
-        _plot_continuous_var_dist(var_data, ax, show, outliers)
+    if column is not None: 
+        chunks = (chunk[column] for chunk in 
+                read_chunks(source, [column], chunk_size))
+    elif isinstance(source, (str, type(u''))): 
+        raise ValueError('A column must be given to plot from a file.')
     else: 
-        _plot_categorical_var_dist(var_data, ax, show)
+        chunks = source
+
+    return DistributionSummary.from_chunks(chunks, categorical)
 
-def _plot_categorical_var_dist(var_data, ax, show): 
+def _plot_categorical_var_dist(var_data, ax, show, top_k=None): 
     """Plot a boxplot of the continuous variable data inputted. 
     
     This is a helper function called from plot_var_dist. It'll 
     be used in the case that categorical data is passed in. 
 
     Args: 
-        var_data: 1d numpy.ndarray
+        var_data: 1d numpy.ndarray or DistributionSummary
+            Either just needs a `value_counts` method. 
         ax: matplotlib.pyplot.Axes object 
             This may or may not be None, depending on what 
             was passed from plot_var_dist. 
         show: bool 
+        top_k (optional): int
+            See `plot_var_dist`. 
+
+    Returns: 
+        The matplotlib.pyplot.Axes object plotted on. 
     """
 
-    var_data_counts = var_data.value_counts()
-    var_data_percs = var_data_counts / var_data_counts.sum()
+    categories, counts = _calc_category_counts(var_data)
+    if top_k is not None or len(categories) > TOP_K_CATEGORIES: 
+        top_k = TOP_K_CATEGORIES if top_k is None else top_k
+        ax = _plot_top_k_categories(categories, counts, top_k, ax)
+        if show: 
+            plt.show()
+        return ax
+
+    order = np.argsort(-counts, kind='mergesort')
+    var_data_counts = pd.Series(counts[order], index=categories[order])
+    var_data_percs = var_data_counts / float(var_data_counts.sum())
 
     if ax: 
         sns.barplot(var_data_percs.index, 
@@ -79,6 +216,90 @@ def _plot_categorical_var_dist(var_data, ax, show):
 
     if show: 
         plt.show()
+    return ax
+
+def _calc_category_counts(var_data): 
+    """Count the obs. in each category of a categorical variable. 
+
+    The data is converted to integer codes (using the codes of a 
+    pandas Categorical directly, or factorizing anything else), 
+    and counted with numpy.bincount. Missing values are dropped. 
+
+    Args: 
+        var_data: 1d numpy.ndarray, pandas.Series, or 
+        DistributionSummary
+
+    Returns: 
+        categories: pandas.Index
+        counts: 1d numpy.ndarray of ints
+    """
+
+    if isinstance(var_data, DistributionSummary): 
+        var_data_counts = var_data.value_counts()
+        return var_data_counts.index, var_data_counts.values
+
+    var_data = pd.Series(var_data)
+    if hasattr(var_data, 'cat'): 
+        codes = var_data.cat.codes.values
+        categories = var_data.cat.categories
+    else: 
+        codes, categories = pd.factorize(var_data)
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+
+    return pd.Index(categories), counts
+
+def _plot_top_k_categories(categories, counts, top_k, ax=None): 
+    """Plot the percentages of the most common categories. 
+
+    This is the fast path of _plot_categorical_var_dist for variables 
+    with many categories. The `top_k` categories are found with a 
+    partial sort (numpy.argpartition), and the rest are summed into 
+    an "other" bar. All of the bars are drawn as a single 
+    PolyCollection, rather than one patch per bar, and only the 
+    (at most `top_k` + 1) plotted bars get text labels. 
+
+    Args: 
+        categories: pandas.Index
+        counts: 1d numpy.ndarray of ints
+        top_k: int
+        ax (optional): matplotlib.pyplot.Axes object
+
+    Returns: 
+        The matplotlib.pyplot.Axes object plotted on. 
+    """
+
+    if ax is None: 
+        ax = plt.gca()
+
+    total = float(counts.sum())
+    if len(categories) > top_k: 
+        top_idx = np.argpartition(-counts, top_k - 1)[:top_k]
+        top_idx = top_idx[np.argsort(-counts[top_idx], kind='mergesort')]
+        labels = [str(category) for category in categories[top_idx]]
+        percs = np.append(counts[top_idx], total - counts[top_idx].sum())
+        labels.append('other ({0})'.format(len(categories) - top_k))
+    else: 
+        top_idx = np.argsort(-counts, kind='mergesort')
+        labels = [str(category) for category in categories[top_idx]]
+        percs = counts[top_idx].astype(np.float64)
+    percs = percs / total
+
+    xs = np.arange(percs.shape[0])
+    lefts, rights = xs - 0.4, xs + 0.4
+    bottoms = np.zeros(percs.shape[0])
+    verts = np.stack([np.column_stack([lefts, bottoms]), 
+        np.column_stack([lefts, percs]), np.column_stack([rights, percs]), 
+        np.column_stack([rights, bottoms])], axis=1)
+    colors = sns.color_palette("BuGn_d", percs.shape[0])
+    ax.add_collection(PolyCollection(verts, facecolors=colors))
+
+    ax.set_xlim(-0.5, percs.shape[0] - 0.5)
+    ax.set_ylim(0, percs.max() * 1.1 if percs.shape[0] else 1)
+    ax.set_xticks(xs)
+    ax.set_xticklabels(labels, rotation=90)
+    _add_bar_labels(ax, percs, percs)
+
+    return ax
 
 def _add_bar_text(ax, bars, labels): 
     """Add text labels to some plotted bars. 
@@ -89,17 +310,56 @@ def _add_bar_text(ax, bars, labels):
         labels: numpy.ndarray
     """
 
-    labels_font = {'fontname':'Arial', 'size':'12', 
-            'color':'black', 'weight':'normal', 'verticalalignment':'bottom'}
+    heights = [bar.get_height() for bar in bars]
+    _add_bar_labels(ax, heights, labels)
 
-    for idx, bar, label in izip(xrange(len(labels)), bars, labels): 
-        height = bar.get_height()
-        width = bar.get_width()
-        label = label * 100
-        ax.text(idx, height, "{0:.2f}".format(label), 
-                ha='center', va='bottom', **labels_font)
+def _add_bar_labels(ax, heights, labels): 
+    """Add text labels above bars of the given heights. 
+
+    The bars are expected to be centered at 0, 1, 2, ... Rather than 
+    one Text artist per bar, the labels are drawn as a single 
+    PathCollection of their outlines - each is placed at the top of 
+    its bar (in data coordinates), and sized in points. 
 
-def _plot_continuous_var_dist(var_data, ax, show, outliers): 
+    Args: 
+        ax: matplotlib.axes object
+        heights: iterable of floats
+        labels: numpy.ndarray
+
+    Returns: 
+        The matplotlib.collections.PathCollection of the labels, or 
+        None if there aren't any. 
+    """
+
+    labels_font = FontProperties(family='Arial', size=12, weight='normal')
+
+    paths, offsets = [], []
+    for idx, (height, label) in enumerate(zip(heights, labels)): 
+        label = label * 100
+        path = TextPath((0, 0), "{0:.2f}".format(label), prop=labels_font)
+        extents = path.get_extents()
+        paths.append(path.transformed(Affine2D().translate(
+            -(extents.x0 + extents.x1) / 2., 0)))
+        offsets.append((idx, height))
+    if not paths: 
+        return None
+
+    # The keyword for the transform of the offsets was renamed in 
+    # matplotlib 3.6. 
+    offset_kwarg = 'offset_transform' if hasattr(PathCollection, 
+            'set_offset_transform') else 'transOffset'
+    labels_collection = PathCollection(paths, offsets=offsets, 
+            facecolors='black', edgecolors='none', 
+            **{offset_kwarg: ax.transData})
+    labels_collection.set_transform(Affine2D().scale(1 / 72.) + 
+            ax.figure.dpi_scale_trans)
+    labels_collection.set_clip_on(False)
+    ax.add_collection(labels_collection, autolim=False)
+
+    return labels_collection
+
+def _plot_continuous_var_dist(var_data, ax, show, outliers, bins=20, 
+        large_n_threshold=None, approx_quantiles=False): 
     """Plot a boxplot of the continuous variable data inputted, both with 
     and without outliers. 
 
@@ -107,7 +367,7 @@ def _plot_continuous_var_dist(var_data, ax, show, outliers):
     be used in the case that continuous data is passed in. 
 
     Args: 
-        var_data: 1d numpy.ndarray
+        var_data: 1d numpy.ndarray or DistributionSummary
         ax: matplotlib.pyplot.Axes object 
             This may or may not be None, depending on what 
             was passed from plot_var_dist. If it is None, 
@@ -120,15 +380,34 @@ def _plot_continuous_var_dist(var_data, ax, show, outliers):
         outliers: bool
             Denotes whether or not to plot the inputted data just
             as is, or as is as well as with outliers removed. 
+        bins (optional): int
+        large_n_threshold (optional): int
+        approx_quantiles (optional): bool
+            See `plot_var_dist`. 
+
+    Returns: 
+        The matplotlib.pyplot.Axes objects plotted on. 
     """
    
     if ax is None: 
-        f, ax = plt.subplots(1, 4) if not outliers \
+        f, ax = plt.subplots(1, 4) if outliers \
                 else plt.subplots(1, 2)
+
+    if isinstance(var_data, DistributionSummary): 
+        _plot_summary_continuous_var_dist(var_data, ax, outliers, bins)
+        if show: 
+            plt.show()
+        return ax
+    if large_n_threshold is not None and len(var_data) > large_n_threshold: 
+        _plot_binned_continuous_var_dist(var_data, ax, outliers, bins, 
+                approx_quantiles)
+        if show: 
+            plt.show()
+        return ax
     
     # Plot the data with outliers. 
     _plot_box(var_data, ax[0], outliers=True)
-    _plot_hist_kde(var_data, ax[1], outliers=True)
+    _plot_hist_kde(var_data, ax[1], outliers=True, bins=bins)
 
 
     if outliers: 
@@ -136,10 +415,12 @@ def _plot_continuous_var_dist(var_data, ax, show, outliers):
 
         # Plot the data without outliers. 
         _plot_box(var_data_wo_outliers, ax[2], outliers=False)
-        _plot_hist_kde(var_data, ax[3], outliers=False)
+        _plot_hist_kde(var_data_wo_outliers, ax[3], outliers=False, 
+                bins=bins)
 
     if show: 
         plt.show()
+    return ax
 
 def _plot_box(var_data, ax, outliers=True): 
     """Plot a boxplot of the continuous variable data inputted. 
@@ -148,7 +429,7 @@ def _plot_box(var_data, ax, outliers=True):
     used for plotting a box plot of the continuous variable data. 
 
     Args: 
-        var_data: 1d numpy.ndarray
+        var_data: 1d numpy.ndarray or pandas.Series
         ax: matplotlib.pyplot.Axes object
         outliers (optional): bool
             This helps us determine what the title for the 
@@ -157,10 +438,10 @@ def _plot_box(var_data, ax, outliers=True):
 
     title = "With Outliers" if outliers else "Without outliers"
 
-    var_data.plot(kind='box', ax=ax)
+    pd.Series(var_data).plot(kind='box', ax=ax)
     ax.set_title(title)
 
-def _plot_hist_kde(var_data, ax, outliers=True): 
+def _plot_hist_kde(var_data, ax, outliers=True, bins=20): 
     """Plot a histogram/kde with the continuous variable data inputted. 
 
     This is a helper function called from _plot_continuous_var_dist, 
@@ -172,13 +453,283 @@ def _plot_hist_kde(var_data, ax, outliers=True):
         outliers (optional): bool
             This helps us determine what the title for the 
             plot will be. 
+        bins (optional): int
+    """
+
+    title = "With Outliers" if outliers else "Without outliers"
+    sns.distplot(var_data, bins=bins, ax=ax)
+    ax.set_title(title)
+
+def _plot_binned_continuous_var_dist(var_data, ax, outliers, bins, 
+        approx_quantiles): 
+    """Plot the distribution of a large continuous variable from summaries. 
+
+    This is a helper function called from _plot_continuous_var_dist, 
+    and plots the same box and hist/kde plots. Rather than handing the 
+    raw data to the plotting functions, a single pass bins the data 
+    onto a fine grid (`KDE_BINS_PER_BIN` per histogram bin), from which 
+    both the histogram and the KDE are rendered, and the box plot is 
+    drawn from quantiles calculated in linear time (or sketched). 
+    Missing (and infinite) values are dropped first. 
+
+    Args: 
+        var_data: 1d numpy.ndarray
+        ax: matplotlib.pyplot.Axes objects
+        outliers: bool
+        bins: int
+        approx_quantiles: bool
+    """
+
+    var_data = np.asarray(var_data, dtype=np.float64)
+    var_data = var_data[np.isfinite(var_data)]
+    datasets = [(var_data, True)]
+    if outliers: 
+        datasets.append((remove_outliers(var_data), False))
+
+    for idx, (data, with_outliers) in enumerate(datasets): 
+        box_stats = _calc_box_stats(data, approx_quantiles)
+        counts, edges = np.histogram(data, bins=bins * KDE_BINS_PER_BIN)
+        bandwidth = _calc_bandwidth(data.shape[0], data.std(), 
+                box_stats['q3'] - box_stats['q1'])
+
+        _plot_box_stats(box_stats, ax[2 * idx], outliers=with_outliers)
+        _plot_binned_hist_kde(counts, edges, bins, bandwidth, 
+                ax[2 * idx + 1], outliers=with_outliers)
+
+def _plot_summary_continuous_var_dist(summary, ax, outliers, bins): 
+    """Plot the distribution of a continuous variable from its summary. 
+
+    This is a helper function called from _plot_continuous_var_dist, 
+    and plots the same box and hist/kde plots as 
+    `_plot_binned_continuous_var_dist`, but from a DistributionSummary. 
+    The plots without outliers are restricted to the summary's 
+    `outlier_bounds`, using the histogram bins overlapping the bounds, 
+    and the quantiles of the data between them. If the summary is empty 
+    (e.g. the variable is all missing), the axes are left empty. 
+
+    Args: 
+        summary: DistributionSummary
+        ax: matplotlib.pyplot.Axes objects
+        outliers: bool
+        bins: int
+    """
+
+    bounds_lst = [(-np.inf, np.inf, True)]
+    if outliers: 
+        bounds_lst.append(summary.outlier_bounds() + (False, ))
+
+    for idx, (lower_bound, upper_bound, with_outliers) in \
+            enumerate(bounds_lst): 
+        if summary.n == 0: 
+            title = "With Outliers" if with_outliers else "Without outliers"
+            ax[2 * idx].set_title(title)
+            ax[2 * idx + 1].set_title(title)
+            continue
+
+        counts, edges = summary.histogram(lower_bound, upper_bound)
+        box_stats = _calc_summary_box_stats(summary, lower_bound, 
+                upper_bound)
+        centers = (edges[:-1] + edges[1:]) / 2.
+        std_dev = np.sqrt(np.average((centers - box_stats['mean']) ** 2, 
+            weights=counts))
+        bandwidth = _calc_bandwidth(counts.sum(), std_dev, 
+                box_stats['q3'] - box_stats['q1'])
+
+        _plot_box_stats(box_stats, ax[2 * idx], outliers=with_outliers)
+        _plot_binned_hist_kde(counts, edges, bins, bandwidth, 
+                ax[2 * idx + 1], outliers=with_outliers)
+
+def _calc_summary_box_stats(summary, lower_bound=-np.inf, 
+        upper_bound=np.inf, whis=1.5): 
+    """Calculate the statistics needed to draw a box plot from a summary. 
+
+    This is the summary counterpart of `_calc_box_stats`. The quartiles 
+    come from the summary's sketch, and each whisker is placed at the 
+    edge of the outermost non-empty histogram bin within `whis` IQRs 
+    of the quartiles (clipped to the data's min/max), which is within 
+    a bin width of the exact whisker. 
+
+    Args: 
+        summary: DistributionSummary
+        lower_bound (optional): float
+        upper_bound (optional): float
+            Restricts the statistics to the data within the bounds. 
+        whis (optional): float
+
+    Returns: 
+        dict, in the format expected by matplotlib's Axes.bxp. 
+    """
+
+    q1, med, q3 = summary.quantile([0.25, 0.5, 0.75], lower_bound, 
+            upper_bound)
+    iqr = q3 - q1
+    data_min = max(summary.min, lower_bound)
+    data_max = min(summary.max, upper_bound)
+    lower_fence = max(q1 - whis * iqr, data_min)
+    upper_fence = min(q3 + whis * iqr, data_max)
+
+    counts, edges = summary.histogram(lower_fence, upper_fence)
+    nonempty = np.flatnonzero(counts)
+    whislo = max(edges[nonempty[0]], lower_fence) if nonempty.shape[0] \
+            else lower_fence
+    whishi = min(edges[nonempty[-1] + 1], upper_fence) \
+            if nonempty.shape[0] else upper_fence
+    # The clipped min/max aren't obs. when the data is restricted, so 
+    # there are only fliers to show for the unrestricted data. 
+    fliers = [val for val in (summary.min, summary.max) 
+            if val < whislo or val > whishi] if np.isinf(lower_bound) else []
+
+    counts, edges = summary.histogram(lower_bound, upper_bound)
+    centers = (edges[:-1] + edges[1:]) / 2.
+    mean = summary.moments.mean if np.isinf(lower_bound) \
+            else np.average(centers, weights=counts)
+
+    return {'q1': q1, 'med': med, 'q3': q3, 'whislo': whislo, 
+            'whishi': whishi, 'fliers': fliers, 'mean': mean}
+
+def _calc_box_stats(var_data, approx_quantiles=False, whis=1.5): 
+    """Calculate the statistics needed to draw a box plot. 
+
+    The quartiles are calculated in linear time with `select_quantiles` 
+    (or from a `QuantileSketch`), and the whiskers extend to the most 
+    extreme obs. within `whis` IQRs of the quartiles, as in 
+    matplotlib's boxplot. Since a large variable can have millions of 
+    fliers, only the minimum and maximum are kept as fliers. 
+
+    Args: 
+        var_data: 1d numpy.ndarray
+        approx_quantiles (optional): bool
+        whis (optional): float
+
+    Returns: 
+        dict, in the format expected by matplotlib's Axes.bxp. 
+    """
+
+    if approx_quantiles: 
+        quartiles = QuantileSketch.from_chunks([var_data]).quantile(
+                [0.25, 0.5, 0.75])
+    else: 
+        quartiles = select_quantiles(var_data, [0.25, 0.5, 0.75])
+    q1, med, q3 = quartiles
+    iqr = q3 - q1
+
+    data_min, data_max = var_data.min(), var_data.max()
+    whislo = var_data[var_data >= q1 - whis * iqr].min()
+    whishi = var_data[var_data <= q3 + whis * iqr].max()
+    fliers = [val for val in (data_min, data_max) 
+            if val < whislo or val > whishi]
+
+    return {'q1': q1, 'med': med, 'q3': q3, 'whislo': whislo, 
+            'whishi': whishi, 'fliers': fliers, 'mean': var_data.mean()}
+
+def _calc_bandwidth(n_obs, std_dev, iqr): 
+    """Calculate the KDE bandwidth with Scott's rule. 
+
+    Args: 
+        n_obs: int
+        std_dev: float
+        iqr: float
+    """
+
+    spread = min(std_dev, iqr / 1.349) if iqr > 0 else std_dev
+    return 1.059 * spread * n_obs ** (-0.2)
+
+def _calc_binned_kde(counts, edges, bandwidth): 
+    """Calculate a Gaussian KDE from binned counts. 
+
+    Convolve the counts with a Gaussian kernel sampled at the bin 
+    width, using an FFT. This costs O(m log m) for m bins, rather 
+    than the O(n * m) of evaluating the KDE at each grid point over 
+    all n obs. The grid is extended by the kernel's half width on 
+    either side so that the tails of the KDE are included. 
+
+    Args: 
+        counts: 1d numpy.ndarray
+        edges: 1d numpy.ndarray
+            Holds the (uniformly spaced) edges of the bins. 
+        bandwidth: float
+
+    Returns: 
+        grid: 1d numpy.ndarray
+        density: 1d numpy.ndarray
+    """
+
+    bin_width = edges[1] - edges[0]
+    half_width = int(np.ceil(4 * bandwidth / bin_width)) if bandwidth > 0 \
+            else 0
+    half_width = min(half_width, counts.shape[0])
+    offsets = np.arange(-half_width, half_width + 1) * bin_width
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) if bandwidth > 0 \
+            else np.ones(1)
+    kernel /= kernel.sum()
+
+    n_grid = counts.shape[0] + kernel.shape[0] - 1
+    n_fft = 2 ** int(np.ceil(np.log2(n_grid)))
+    density = np.fft.irfft(np.fft.rfft(counts, n_fft) * 
+            np.fft.rfft(kernel, n_fft), n_fft)[:n_grid]
+    density = np.maximum(density, 0) / (counts.sum() * bin_width)
+
+    first_center = edges[0] + bin_width / 2.
+    grid = first_center + (np.arange(n_grid) - half_width) * bin_width
+
+    return grid, density
+
+def _plot_box_stats(box_stats, ax, outliers=True): 
+    """Plot a boxplot from pre-calculated statistics. 
+
+    This is the summary counterpart of `_plot_box`. 
+
+    Args: 
+        box_stats: dict
+            See `_calc_box_stats`. 
+        ax: matplotlib.pyplot.Axes object
+        outliers (optional): bool
+            This helps us determine what the title for the 
+            plot will be. 
+    """
+
+    title = "With Outliers" if outliers else "Without outliers"
+
+    ax.bxp([box_stats])
+    ax.set_title(title)
+
+def _plot_binned_hist_kde(counts, edges, bins, bandwidth, ax, 
+        outliers=True): 
+    """Plot a histogram/kde from fine binned counts. 
+
+    This is the summary counterpart of `_plot_hist_kde`. The fine bins 
+    are summed into (at most) `bins` histogram bins, and convolved into 
+    the KDE. 
+
+    Args: 
+        counts: 1d numpy.ndarray
+            Holds counts over uniform bins. 
+        edges: 1d numpy.ndarray
+        bins: int
+        bandwidth: float
+        ax: matplotlib.pyplot.Axes object
+        outliers (optional): bool
+            This helps us determine what the title for the 
+            plot will be. 
     """
 
     title = "With Outliers" if outliers else "Without outliers"
-    sns.distplot(var_data, bins=20, ax=ax)
+
+    boundaries = np.unique(np.linspace(0, counts.shape[0], 
+        min(bins, counts.shape[0]) + 1).astype(int))
+    hist_counts = np.add.reduceat(counts, boundaries[:-1])
+    hist_edges = edges[boundaries]
+    hist_widths = np.diff(hist_edges)
+    hist_density = hist_counts / (float(counts.sum()) * hist_widths)
+    ax.bar(hist_edges[:-1], hist_density, width=hist_widths, align='edge', 
+            alpha=0.4)
+
+    grid, density = _calc_binned_kde(counts, edges, bandwidth)
+    ax.plot(grid, density)
     ax.set_title(title)
 
-def plot_binary_response(df, categorical, response): 
+def plot_binary_response(df, categorical, response, show=True, ax=None, 
+        response_counts=None, stats=None, chunk_size=10 ** 6): 
     """Plot the percentage of a True/False binary response across
     a categorical variable. 
 
@@ -189,29 +740,145 @@ def plot_binary_response(df, categorical, response):
     makes up as the text above the bar. 
 
     Args: 
-        df: Pandas DataFrame
+        df: Pandas DataFrame, str, or iterator of DataFrame chunks
+            This may be None if `response_counts` is passed in. See 
+            `calc_binary_responses`. 
         categorical: str
             Holds the column name of the categorical variable. 
         response: str
             Holds the column name of the response variable. 
+        show (optional): bool 
+            Whether or not to show the plot. Defaults to True. 
+        ax (optional): matplotlib.pyplot.Axes object
+        response_counts (optional): Pandas DataFrame
+            Holds pre-aggregated counts, in the format returned by 
+            `calc_binary_responses`. If passed in, `df` isn't used. 
+        stats (optional): instrumentation.CallStats
+            Holds stats to record the 'aggregate', 'draw', and 'show' 
+            stages of the call in, along with the number of obs., 
+            categories, and artists drawn. 
+        chunk_size (optional): int
+            Number of rows to read at a time, if `df` is a file path. 
     """
 
-    category_numbers = df.groupby(categorical).count().iloc[:, 0]
-    category_percents = category_numbers / category_numbers.sum()
+    stats = CallStats() if stats is None else stats
+    stats.begin('plot_binary_response')
+
+    try: 
+        with stats.stage('aggregate') as stage: 
+            if response_counts is None: 
+                response_counts = calc_binary_responses(df, categorical, 
+                        response, chunk_size)
+
+            category_numbers = response_counts['count']
+            category_percents = category_numbers / category_numbers.sum()
+            response_percents = response_counts['response_count'] / \
+                    category_numbers
+            stage.counts['n_obs'] = int(category_numbers.sum())
+            stage.counts['n_categories'] = len(category_numbers)
     
-    categories = category_numbers.index
+        categories = category_numbers.index
+
+        with stats.stage('draw') as stage: 
+            if ax: 
+                sns.barplot(categories, response_percents.values, 
+                        palette="BuGn_d", ax=ax) 
+            else: 
+                ax = sns.barplot(categories, response_percents.values, 
+                        palette="BuGn_d") 
+
+            bars = ax.patches
+            labels = category_percents.values
+            _add_bar_text(ax, bars, labels) 
+            stage.counts['n_artists'] = count_artists([ax])
+
+        if show: 
+            with stats.stage('show'): 
+                plt.show()
+    finally: 
+        stats.finish()
+
+def calc_binary_responses(df, categoricals, response, chunk_size=10 ** 6): 
+    """Calculate the counts of a True/False binary response across 
+    categorical variables. 
+
+    For each categorical variable, count the obs. in each category, 
+    and the number of those obs. where the response is True. The 
+    response column is converted to a 0/1 array once, and each 
+    categorical column is factorized (into integer codes) and 
+    aggregated with numpy.bincount, so each column is traversed 
+    once no matter how many categories it has. Obs. with a missing 
+    category are dropped (as with `groupby`). 
+
+    If the path of a CSV/Parquet file, or a one-shot iterator of 
+    DataFrame chunks, is passed in, only the categorical and response 
+    columns are read, a chunk at a time, and the counts of each chunk 
+    are added up. 
 
-    response_percents = []
-    for idx, category in enumerate(categories):
-        response_counts = ((df[categorical] == category) & 
-            (df[response] == True)).sum()
-        response_cat_percent = float(response_counts) / category_numbers[idx] 
-        response_percents.append(response_cat_percent)
+    Args: 
+        df: Pandas DataFrame, str, or iterator of DataFrame chunks
+        categoricals: str or list of strs
+            Holds the column name(s) of the categorical variable(s). 
+        response: str
+            Holds the column name of the response variable. 
+        chunk_size (optional): int
+            Number of rows to read at a time, if `df` is a file path. 
 
-    ax = sns.barplot(categories, response_percents, palette="BuGn_d") 
+    Returns: 
+        A Pandas DataFrame indexed by category, with `count` and 
+        `response_count` columns - or if a list of categoricals was 
+        passed in, a dict of these keyed by column name. 
+    """
 
-    bars = ax.patches
-    labels = category_percents.values
-    _add_bar_text(ax, bars, labels) 
+    single_categorical = not isinstance(categoricals, (list, tuple))
+    if single_categorical: 
+        categoricals = [categoricals]
+
+    if is_chunked_source(df): 
+        columns = list(categoricals) + ([response] if response not in 
+                categoricals else [])
+        response_counts = _calc_frame_binary_responses(pd.DataFrame(
+            columns=columns), categoricals, response)
+        for chunk in read_chunks(df, columns, chunk_size): 
+            chunk_counts = _calc_frame_binary_responses(chunk, 
+                    categoricals, response)
+            for categorical in categoricals: 
+                response_counts[categorical] = response_counts[ 
+                        categorical].add(chunk_counts[categorical], 
+                                fill_value=0).astype(int)
+    else: 
+        response_counts = _calc_frame_binary_responses(df, categoricals, 
+                response)
+
+    if single_categorical: 
+        return response_counts[categoricals[0]]
+    return response_counts
+
+def _calc_frame_binary_responses(df, categoricals, response): 
+    """Calculate the counts of `calc_binary_responses` for a DataFrame. 
+
+    Args: 
+        df: Pandas DataFrame
+        categoricals: list of strs
+        response: str
+
+    Returns: 
+        dict of Pandas DataFrames keyed by column name. 
+    """
 
-    plt.show()
+    response_vals = (df[response].values == True).astype(np.float64)
+
+    response_counts = {}
+    for categorical in categoricals: 
+        codes, categories = pd.factorize(df[categorical], sort=True)
+        valid = codes >= 0
+        codes = codes[valid]
+        counts = np.bincount(codes, minlength=len(categories))
+        true_counts = np.bincount(codes, weights=response_vals[valid], 
+                minlength=len(categories))
+        response_counts[categorical] = pd.DataFrame(
+                {'count': counts, 'response_count': true_counts.astype(int)}, 
+                index=pd.Index(categories, name=categorical), 
+                columns=['count', 'response_count'])
+
+    return response_counts
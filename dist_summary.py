@@ -0,0 +1,465 @@
+"""A mergeable summary of the distribution of a variable.
+
+This module contains the `DistributionSummary` class, which holds
+everything `dist_plotting.plot_var_dist` needs to plot the
+distribution of a variable, without holding the variable itself.
+A summary can be built up a batch at a time, merged with summaries
+built elsewhere (e.g. in other processes, or on other days), and
+serialized to a compact string of bytes to ship between them.
+
+For a continuous variable, the summary holds the count, moments,
+min/max, a histogram, and a `QuantileSketch`. For a categorical
+variable, it holds the count of each category.
+
+`read_chunks` reads only the needed columns of a CSV or Parquet file
+(or of an iterator of DataFrames) a bounded number of rows at a time,
+so that a summary of a file larger than memory can be built with
+`DistributionSummary.from_chunks`.
+"""
+
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .processing import RunningMoments, QuantileSketch
+
+class DistributionSummary(object):
+    """Mergeable summary of the distribution of a variable.
+
+    The histogram of a continuous summary can't use edges fixed up
+    front (the range of the data isn't known until it has all been
+    seen), and two summaries can only be merged if their edges line up.
+    So, its bins are aligned to a global grid - bin i covers
+    [i * width, (i + 1) * width) - where the width is a power of two.
+    Whenever the data spans more than `n_bins` bins, the width is
+    doubled by merging neighboring bins, which keeps any two summaries
+    alignable regardless of the order the data came in.
+
+    Missing values (and for continuous summaries, infs) are counted in
+    `n_missing`, and left out of everything else.
+
+    Args:
+        categorical (optional): bool
+        n_bins (optional): int
+            Holds the maximum number of histogram bins to keep.
+        sketch_size (optional): int
+            Holds the `k` to build the `QuantileSketch` with.
+    """
+
+    def __init__(self, categorical=False, n_bins=640, sketch_size=200):
+        self.categorical = categorical
+        self.n_bins = n_bins
+        self.sketch_size = sketch_size
+        self.n = 0
+        self.n_missing = 0
+
+        if categorical:
+            self.category_counts = {}
+        else:
+            self.moments = RunningMoments()
+            self.sketch = QuantileSketch(sketch_size)
+            self.min, self.max = np.inf, -np.inf
+            self.bin_width_exp = None
+            self.bin_offset = 0
+            self.bin_counts = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_data(cls, var_data, categorical=False, **kwargs):
+        """Build a summary from a single batch of data.
+
+        Args:
+            var_data: 1d numpy.ndarray or pandas.Series
+            categorical (optional): bool
+            kwargs: passed on to DistributionSummary
+        """
+
+        return cls(categorical, **kwargs).update(var_data)
+
+    @classmethod
+    def from_chunks(cls, chunks, categorical=False, **kwargs):
+        """Build a summary from an iterable of batches of data.
+
+        Only one batch is held in memory at a time.
+
+        Args:
+            chunks: iterable of 1d numpy.ndarrays or pandas.Series
+            categorical (optional): bool
+            kwargs: passed on to DistributionSummary
+        """
+
+        summary = cls(categorical, **kwargs)
+        for chunk in chunks:
+            summary.update(chunk)
+        return summary
+
+    def update(self, var_data):
+        """Add a batch of data to the summary.
+
+        Args:
+            var_data: 1d numpy.ndarray or pandas.Series
+
+        Returns:
+            The summary itself, so that calls can be chained.
+        """
+
+        if self.categorical:
+            var_data = pd.Series(np.asarray(var_data).ravel())
+            counts = var_data.value_counts()
+            self._add_category_counts(counts.index, counts.values)
+            self.n += int(counts.sum())
+            self.n_missing += var_data.shape[0] - int(counts.sum())
+            return self
+
+        var_data = np.asarray(var_data, dtype=np.float64).ravel()
+        finite = np.isfinite(var_data)
+        self.n_missing += var_data.shape[0] - int(finite.sum())
+        var_data = var_data[finite]
+        if var_data.shape[0] == 0:
+            return self
+
+        self.n += var_data.shape[0]
+        self.moments.update(var_data)
+        self.sketch.update(var_data)
+        self.min = min(self.min, var_data.min())
+        self.max = max(self.max, var_data.max())
+
+        # Bin the batch at a width wide enough for the range of all of
+        # the data so far, so that it never takes more than `n_bins`
+        # bins (however wide its range is relative to earlier batches).
+        width_exp = self._calc_bin_width_exp()
+        if self.bin_width_exp is None:
+            self.bin_width_exp = width_exp
+        bin_idx = np.floor(var_data / 2. ** width_exp).astype(np.int64)
+        offset = bin_idx.min()
+        counts = np.bincount(bin_idx - offset)
+        self._add_bin_counts(width_exp, offset, counts)
+
+        return self
+
+    def merge(self, other):
+        """Merge another summary into this one.
+
+        Args:
+            other: DistributionSummary
+
+        Returns:
+            The summary itself, so that calls can be chained.
+        """
+
+        if other.categorical != self.categorical:
+            raise ValueError('Cannot merge categorical and continuous '
+                    'summaries.')
+
+        self.n += other.n
+        self.n_missing += other.n_missing
+        if self.categorical:
+            self._add_category_counts(list(other.category_counts.keys()),
+                    list(other.category_counts.values()))
+            return self
+
+        if other.bin_width_exp is None:
+            return self
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if self.bin_width_exp is None:
+            self.bin_width_exp = other.bin_width_exp
+        self._add_bin_counts(other.bin_width_exp, other.bin_offset,
+                other.bin_counts)
+
+        return self
+
+    def value_counts(self):
+        """Return the category counts of a categorical summary.
+
+        Returns:
+            A pandas.Series of counts, sorted in descending order (as
+            with pandas.Series.value_counts).
+        """
+
+        counts = pd.Series(self.category_counts)
+        return counts.sort_values(ascending=False)
+
+    def histogram(self, lower_bound=-np.inf, upper_bound=np.inf):
+        """Return the histogram of a continuous summary.
+
+        Args:
+            lower_bound (optional): float
+            upper_bound (optional): float
+                Only bins overlapping these bounds are returned.
+
+        Returns:
+            counts: 1d numpy.ndarray of ints
+            edges: 1d numpy.ndarray of floats
+                Both are empty if the summary is.
+        """
+
+        if self.bin_width_exp is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        bin_width = 2. ** self.bin_width_exp
+        edges = (self.bin_offset + np.arange(self.bin_counts.shape[0] + 1)) \
+                * bin_width
+        keep = (edges[1:] > lower_bound) & (edges[:-1] <= upper_bound)
+        keep_idx = np.flatnonzero(keep)
+        if keep_idx.shape[0] == 0:
+            return np.zeros(0, dtype=np.int64), edges[:1]
+
+        first, last = keep_idx[0], keep_idx[-1] + 1
+        return self.bin_counts[first:last], edges[first:last + 1]
+
+    def quantile(self, quantiles, lower_bound=-np.inf, upper_bound=np.inf):
+        """Approximate quantiles of a continuous summary.
+
+        Args:
+            quantiles: float or iterable of floats
+            lower_bound (optional): float
+            upper_bound (optional): float
+                If given, the quantiles are of only the data within
+                the bounds (e.g. the data with outliers removed).
+        """
+
+        if np.isinf(lower_bound) and np.isinf(upper_bound):
+            return self.sketch.quantile(quantiles)
+
+        lower_rank, upper_rank = self.sketch.cdf([lower_bound, upper_bound])
+        quantiles = np.asarray(quantiles, dtype=np.float64)
+        return self.sketch.quantile(lower_rank + quantiles *
+                (upper_rank - lower_rank))
+
+    def outlier_bounds(self, std_dev_cutoff=2):
+        """Calculate the bounds used by `remove_outliers` to label outliers.
+
+        Args:
+            std_dev_cutoff (optional): int
+        """
+
+        lower_bound = self.moments.mean - std_dev_cutoff * self.moments.std
+        upper_bound = self.moments.mean + std_dev_cutoff * self.moments.std
+
+        return lower_bound, upper_bound
+
+    def to_bytes(self):
+        """Serialize the summary to a compact string of bytes."""
+
+        meta = {'categorical': self.categorical, 'n_bins': self.n_bins,
+                'sketch_size': self.sketch_size, 'n': self.n,
+                'n_missing': self.n_missing}
+        arrays = {}
+        if self.categorical:
+            meta['categories'] = [_to_builtin(category) for category
+                    in self.category_counts.keys()]
+            arrays['category_counts'] = np.array(
+                    list(self.category_counts.values()), dtype=np.int64)
+        elif self.bin_width_exp is not None:
+            meta.update({'moments': [self.moments.n, self.moments.mean,
+                self.moments.m2], 'min': self.min, 'max': self.max,
+                'sketch_n': self.sketch.n,
+                'bin_width_exp': self.bin_width_exp,
+                'bin_offset': int(self.bin_offset)})
+            arrays['bin_counts'] = self.bin_counts
+            arrays['sketch_items'] = np.concatenate(self.sketch.compactors)
+            arrays['sketch_sizes'] = np.array([items.shape[0] for items
+                in self.sketch.compactors], dtype=np.int64)
+
+        buf = io.BytesIO()
+        np.savez_compressed(buf, meta=np.array(json.dumps(meta)), **arrays)
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, summary_bytes):
+        """Load a summary serialized with `to_bytes`.
+
+        Args:
+            summary_bytes: str
+        """
+
+        arrays = np.load(io.BytesIO(summary_bytes), allow_pickle=False)
+        meta = json.loads(str(arrays['meta']))
+
+        summary = cls(meta['categorical'], meta['n_bins'],
+                meta['sketch_size'])
+        summary.n, summary.n_missing = meta['n'], meta['n_missing']
+        if summary.categorical:
+            summary.category_counts = dict(zip(meta['categories'],
+                arrays['category_counts'].tolist()))
+        elif 'bin_width_exp' in meta:
+            summary.moments = RunningMoments(*meta['moments'])
+            summary.min, summary.max = meta['min'], meta['max']
+            summary.bin_width_exp = meta['bin_width_exp']
+            summary.bin_offset = meta['bin_offset']
+            summary.bin_counts = arrays['bin_counts']
+            summary.sketch.n = meta['sketch_n']
+            split_idx = np.cumsum(arrays['sketch_sizes'])[:-1]
+            summary.sketch.compactors = np.split(arrays['sketch_items'],
+                    split_idx)
+
+        return summary
+
+    def _add_category_counts(self, categories, counts):
+        """Add counts of categories to the summary.
+
+        Args:
+            categories: iterable
+            counts: iterable of ints
+        """
+
+        for category, count in zip(categories, counts):
+            category = _to_builtin(category)
+            self.category_counts[category] = \
+                    self.category_counts.get(category, 0) + int(count)
+
+    def _calc_bin_width_exp(self):
+        """Calculate the bin width exponent that fits the data in `n_bins`.
+
+        The width is the narrowest (power of two, and no narrower than
+        the current width) at which the range between the summary's
+        min and max spans at most `n_bins` bins.
+        """
+
+        span = self.max - self.min
+        span = span if span > 0 else (abs(self.max) or 1.)
+        width_exp = int(np.ceil(np.log2(span / self.n_bins)))
+        if self.bin_width_exp is not None:
+            width_exp = max(width_exp, self.bin_width_exp)
+        while np.floor(self.max / 2. ** width_exp) - \
+                np.floor(self.min / 2. ** width_exp) >= self.n_bins:
+            width_exp += 1
+
+        return width_exp
+
+    def _add_bin_counts(self, bin_width_exp, offset, counts):
+        """Add histogram counts to the summary's histogram.
+
+        Both sets of counts are coarsened to the wider of the two bin
+        widths, combined over the union of their ranges, and coarsened
+        further if that spans more than `n_bins` bins.
+
+        Args:
+            bin_width_exp: int
+            offset: int
+                Holds the index of the first bin of the counts.
+            counts: 1d numpy.ndarray of ints
+        """
+
+        width_exp = max(bin_width_exp, self.bin_width_exp)
+        offset, counts = _coarsen_bins(offset, counts,
+                width_exp - bin_width_exp)
+        own_offset, own_counts = _coarsen_bins(self.bin_offset,
+                self.bin_counts, width_exp - self.bin_width_exp)
+        if own_counts.shape[0] == 0:
+            own_offset = offset
+
+        start = min(offset, own_offset)
+        stop = max(offset + counts.shape[0], own_offset + own_counts.shape[0])
+        while stop - start > self.n_bins:
+            width_exp += 1
+            offset, counts = _coarsen_bins(offset, counts, 1)
+            own_offset, own_counts = _coarsen_bins(own_offset, own_counts, 1)
+            start = min(offset, own_offset)
+            stop = max(offset + counts.shape[0],
+                    own_offset + own_counts.shape[0])
+
+        combined = np.zeros(stop - start, dtype=np.int64)
+        combined[offset - start:offset - start + counts.shape[0]] += counts
+        combined[own_offset - start:own_offset - start +
+                own_counts.shape[0]] += own_counts
+
+        self.bin_width_exp = width_exp
+        self.bin_offset = start
+        self.bin_counts = combined
+
+def read_chunks(source, columns, chunk_size=10 ** 6, read_kwargs=None):
+    """Read columns of a file (or of chunks of a DataFrame) a chunk at a time.
+
+    Files ending in .parquet or .pq are read with pyarrow, a row batch
+    at a time, and anything else with pandas.read_csv. Only `columns`
+    are read, so memory use is bounded by `chunk_size` rows of them.
+
+    Args:
+        source: str, or iterable of pandas DataFrames
+            Holds the path of a CSV/Parquet file, or chunks of a
+            DataFrame that have already been read (e.g. the reader
+            returned by pandas.read_csv with a chunksize).
+        columns: list of strs
+        chunk_size (optional): int
+            Holds the number of rows to read at a time from a file.
+        read_kwargs (optional): dict
+            Holds keyword arguments to pass on to pandas.read_csv
+            (e.g. a `dtype` for the columns, so that it's the same in
+            every chunk), or pyarrow's ParquetFile.iter_batches.
+
+    Yields:
+        pandas DataFrames holding `columns`.
+    """
+
+    columns = list(columns)
+    read_kwargs = {} if read_kwargs is None else read_kwargs
+
+    if not isinstance(source, (str, type(u''))):
+        for chunk in source:
+            yield chunk[columns]
+        return
+
+    if os.path.splitext(source)[1].lower() in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size,
+                columns=columns, **read_kwargs):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(source, usecols=columns,
+                chunksize=chunk_size, **read_kwargs):
+            yield chunk[columns]
+
+def is_chunked_source(data):
+    """Check whether data is a file path or a one-shot iterator of chunks.
+
+    Arrays, Series, DataFrames, and DistributionSummaries are not.
+
+    Args:
+        data: object
+    """
+
+    if isinstance(data, (str, type(u''))):
+        return True
+    return hasattr(data, '__iter__') and not hasattr(data, '__len__') and \
+            not isinstance(data, DistributionSummary)
+
+def _coarsen_bins(offset, counts, n_doublings):
+    """Double the width of histogram bins `n_doublings` times.
+
+    Bin i at the current width falls into bin floor(i / 2) at twice
+    the width.
+
+    Args:
+        offset: int
+            Holds the index of the first bin of the counts.
+        counts: 1d numpy.ndarray of ints
+        n_doublings: int
+    """
+
+    if n_doublings <= 0 or counts.shape[0] == 0:
+        return offset, counts
+
+    factor = 2 ** n_doublings
+    new_idx = (offset + np.arange(counts.shape[0])) // factor
+    new_offset = int(new_idx[0])
+    new_counts = np.bincount(new_idx - new_offset, weights=counts).astype(
+            np.int64)
+
+    return new_offset, new_counts
+
+def _to_builtin(value):
+    """Convert a numpy scalar to the equivalent builtin Python value.
+
+    Args:
+        value: object
+    """
+
+    return value.item() if isinstance(value, np.generic) else value
@@ -3,16 +3,39 @@
 This module contains classes for building geographical maps. At this 
 point in time, it only contains the USMapBuilder class, which allows for 
 the plotting of a US Map based of an inputted geography - country, 
-region, state(s), and/or county (or counties).
+region, state(s), and/or county (or counties), and the 
+`plot_small_multiples` function, which builds one such map per state 
+(or region) from a single parse of a shapefile. A USMapBuilder can also 
+render a sequence of frames of points over its map (e.g. one per hour 
+of events), drawing the boundaries only once (see `render_frames`). 
 
 """
+import collections
+import copy
+import hashlib
+import multiprocessing
+import os
+import subprocess
+
+import matplotlib
 import matplotlib.pyplot as plt
-from mpl_toolkits.basemap import Basemap
-from matplotlib.collections import PatchCollection
+from matplotlib.collections import PatchCollection, LineCollection, \
+        PolyCollection, PathCollection
 from matplotlib.patches import Polygon
+from matplotlib.path import Path
 import fiona
 import numpy as np
 
+from .instrumentation import CallStats, count_artists
+from .geometry import GeometryStore, GeometryCache, ShapefileIndex, \
+        shapefile_stats
+from .projection import AlbersProjection
+from .spatial import SpatialIndex, spatial_join
+
+# Holds Basemap once it's imported. It's slow to import, so it's only 
+# imported when a map is built with it (see `_import_basemap`). 
+_basemap = {}
+
 class USMapBuilder(object): 
     """Builder for a US Map of an inputted geography. 
 
@@ -41,6 +64,7 @@ class USMapBuilder(object):
     ----
         shapefile_path: str
             Filepath pointing to the shapefile to read in and parse. 
+            Can be None if `geometry` is passed in. 
         geo_level (optional): str
             Holds the geographical level to use for plotting 
             ('Country', 'State', 'County'). 
@@ -58,8 +82,51 @@ class USMapBuilder(object):
             Holds the amount of padding to build around the map. 
         ax (optional): matplotlib.pyplot.Axes object 
             Holds an axis to plot the boundaries on. 
+        boundary_color (optional): str 
+            Holds the color to draw the boundaries with. 
+        boundary_width (optional): float 
+            Holds the line width to draw the boundaries with. 
+        fill_color (optional): str 
+            Holds a color to fill the boundaries with. If None, 
+            they're left unfilled. 
+        cache_dir (optional): str 
+            Holds a directory to cache the parsed (and projected) 
+            boundaries in, so that building the same map again (in 
+            this or any other process) skips reading the shapefile. 
+            See `geometry.GeometryCache`. 
+        cache_max_bytes (optional): int 
+            Holds the size the cache is kept under. 
+        simplify_tolerance (optional): float or str 
+            Holds the tolerance (in degrees) to simplify the boundaries 
+            to before drawing them (see `GeometryStore.simplify`). If 
+            'auto', it's set to the size of half a pixel of the figure. 
+            If None, the boundaries aren't simplified. 
+        dpi (optional): int 
+            Holds the DPI the map will be saved at, to use for the 
+            'auto' simplify_tolerance. Defaults to that of the figure. 
+        projection_backend (optional): str 
+            Holds the backend to project the map with - 'basemap', or 
+            'numpy' to use `projection.AlbersProjection`, which skips 
+            the cost of building a Basemap (and doesn't need Basemap 
+            installed). If None, 'basemap' is used if it's installed. 
+        geometry (optional): geometry.GeometryStore 
+            Holds already parsed boundaries to select the specified 
+            geography from, rather than reading the shapefile. 
+        stats (optional): instrumentation.CallStats 
+            Holds stats to record each stage of the build of the map 
+            in (see `_build_map`). Whether or not it's passed in, the 
+            stats are kept in `self.stats`. 
     """
 
+    noncontiguous_fips = {'02', '15', '14', '66', '60', '69' ,'72', '78'}
+    index_suffix = '.attr_index.json'
+
+    # Rendered backgrounds (see `cache_background`), shared between 
+    # builders, keyed by the map parameters and figure size. 
+    background_cache_size = 8
+    _backgrounds = collections.OrderedDict()
+
+
     fips_dict = {'Alabama': '01', 'Alaska': '02', 'Arizona': '04', 
             'Arkansas': '05', 'California': '06', 'Colorado': '08', 
             'Connecticut': '09', 'Deleware': '10', 
@@ -100,14 +167,37 @@ class USMapBuilder(object):
 
     def __init__(self, shapefile_path, geo_level=None, region_names=None, 
                  state_names=None, county_names=None, figsize=None, 
-                 border_padding=1, ax=None): 
+                 border_padding=1, ax=None, boundary_color='black', 
+                 boundary_width=1.5, fill_color=None, cache_dir=None, 
+                 cache_max_bytes=2 ** 30, simplify_tolerance=None, 
+                 dpi=None, projection_backend=None, geometry=None, 
+                 stats=None): 
         self.geo_level = 'Country' if not geo_level else geo_level
         self.figsize = figsize
-        self.lat_pts = []
-        self.lng_pts = []
-        self.coord_paths_lst = []
+        self.geometry = None
+        self._source_geometry = geometry
+        self.stats = CallStats() if stats is None else stats
+        self._spatial_index = None
+        self._background = None
+        self.choropleth_collection = None
         self.border_padding = border_padding 
         self.ax = ax 
+        self.boundary_color = boundary_color
+        self.boundary_width = boundary_width
+        self.fill_color = fill_color
+        self.simplify_tolerance = simplify_tolerance
+        self.dpi = dpi
+        if projection_backend is None: 
+            projection_backend = 'numpy' if _import_basemap() is None \
+                    else 'basemap'
+        if projection_backend == 'basemap' and _import_basemap() is None: 
+            raise ImportError("The 'basemap' projection_backend requires "
+                    "Basemap to be installed.")
+        self.projection_backend = projection_backend
+        self.cache = None
+        self._cache_key = None
+        if cache_dir: 
+            self.cache = GeometryCache(cache_dir, cache_max_bytes)
 
         if region_names: 
             state_names = set(state_name for region_name in region_names \
@@ -137,12 +227,21 @@ class USMapBuilder(object):
         Implement all of the steps necessary for building the 
         map of the specified geography: 
             * Read in the shapefile
-            * Parse the boundaries in the shapefile 
+            * Parse the boundaries in the shapefile (or load them 
+              from the cache, if there is one, or select them from 
+              the geometry passed in, if there is one)
             * Calculate the boundaries/borders necessary to pass
               to Basemap
             * Initalize the Basemap
             * Plot the Basemap
 
+        Each of these is recorded as a stage in `self.stats` - 
+        'select_geometry', 'load_cache', or 'open' and 'parse_paths' 
+        (and 'store_cache'), depending on where the boundaries come 
+        from (see `_load_geometry`), then 'calc_bounds', 'calc_corners', 
+        'create_map', and 'plot_map' (with the number of vertices and 
+        artists drawn). 
+
         Args: 
         -----
             shapefile_path: str
@@ -150,27 +249,94 @@ class USMapBuilder(object):
                 use for building of the Basemap. 
         """
 
-        src = fiona.open(shapefile_path)  
-        self._parse_paths(src)
+        self.stats.begin('USMapBuilder')
+
         try: 
-            self._calc_bounds()
-        except ValueError as e: 
-            raise Exception('Double check that you put in the appropriate state/county level shapefile that corresponds to the self.geo_level.')
-        self._calc_corners()
-        self._create_map()
-        self._plot_map()
-        src.close()
-
-    def _parse_paths(self, src): 
+            self._load_geometry(shapefile_path)
+            with self.stats.stage('calc_bounds'): 
+                try: 
+                    self._calc_bounds()
+                except ValueError as e: 
+                    raise Exception('Double check that you put in the appropriate state/county level shapefile that corresponds to the self.geo_level.')
+            with self.stats.stage('calc_corners'): 
+                self._calc_corners()
+            with self.stats.stage('create_map'): 
+                self._create_map()
+            with self.stats.stage('plot_map') as stage: 
+                self._plot_map()
+                stage.counts['n_vertices'] = \
+                        self.display_geometry.coords.shape[0]
+                stage.counts['n_artists'] = count_artists(
+                        [self.geo_map._check_ax()])
+        finally: 
+            self.stats.finish()
+
+    def _load_geometry(self, shapefile_path): 
+        """Load the boundaries of the specified geography.
+
+        Select them from the geometry passed in, if there is one, or 
+        load them from the cache, if there is one, or otherwise read 
+        and parse them from the shapefile. The stage that produces 
+        the boundaries records the number of features, rings, and 
+        vertices in them. Boundaries selected from geometry passed in 
+        are keyed in the cache (for their simplified and projected 
+        versions) by a hash of their coordinates. 
+
+        Args: 
+        -----
+            shapefile_path: str
+        """
+
+        if self._source_geometry is not None: 
+            with self.stats.stage('select_geometry') as stage: 
+                self.geometry = self._select_geometry(self._source_geometry)
+                self._count_geometry(stage)
+                if self.cache is not None: 
+                    self._cache_key = GeometryCache.make_geometry_key(
+                            self.geometry, geo_level=self.geo_level)
+        elif self.cache is not None: 
+            with self.stats.stage('load_cache') as stage: 
+                self._cache_key = GeometryCache.make_key(shapefile_path, 
+                        geo_level=self.geo_level, 
+                        state_fips=getattr(self, 'state_fips', None), 
+                        county_names=getattr(self, 'county_names', None))
+                self.geometry = self.cache.load(self._cache_key)
+                if self.geometry is not None: 
+                    self._count_geometry(stage)
+
+        if self.geometry is None: 
+            with self.stats.stage('open'): 
+                src = fiona.open(shapefile_path)  
+                index = self._load_index(shapefile_path)
+            with self.stats.stage('parse_paths') as stage: 
+                self._parse_paths(src, index)
+                src.close()
+                self._count_geometry(stage)
+            if self.cache is not None: 
+                with self.stats.stage('store_cache'): 
+                    self.cache.store(self._cache_key, self.geometry)
+
+    def _count_geometry(self, stage): 
+        """Record the size of the loaded boundaries in a stage's stats.
+
+        Args: 
+        -----
+            stage: instrumentation.StageStats
+        """
+
+        stage.counts['n_features'] = self.geometry.n_features
+        stage.counts['n_rings'] = self.geometry.n_rings
+        stage.counts['n_vertices'] = self.geometry.coords.shape[0]
+
+    def _parse_paths(self, src, index): 
         """Parse the basemap paths to use only what we want to plot.
 
-        Run through each of the boundaries given in the opened 
-        shapefile passed in and grab only those that correspond 
-        to the specified geography (region, state, county). While
-        parsing, keep track of the min/max lat/long coordinates to 
-        later calculate the boundaries/borders of the Basemap with. 
-        Store these in `self.lng_pts` and `self.lat_pts`, and store
-        the parsed boundaries in `self.coord_paths_list`. 
+        Look up the ids of the boundaries in the opened shapefile that 
+        correspond to the specified geography (region, state, county) 
+        in its attribute index, and read only those. The parsed 
+        boundaries are stored in `self.geometry`, a GeometryStore 
+        that holds all of their coordinates in one contiguous array 
+        (see the `geometry` module). 
 
         Args: 
         ----
@@ -178,106 +344,86 @@ class USMapBuilder(object):
                 Inputted collection of boundaries that have been 
                 grabbed from the shapefile (using fiona) inputted 
                 to the class. 
+            index: geometry.ShapefileIndex
+                Holds the attribute index of the shapefile. 
         """
-        
-        noncontiguous = {'02', '15', '14', '66', '60', '69' ,'72', '78'}
- 
-        for feature in src: 
-            country_mask = self.geo_level == 'Country' and \
-                    feature['properties']['STATEFP'] not in noncontiguous
-            state_mask = self.geo_level == 'State' and \
-                    feature['properties']['STATEFP'] in self.state_fips
-            county_mask = self.geo_level == 'County' and \
-                    feature['properties']['STATEFP'] in self.state_fips and \
-                    feature['properties']['NAME'] in self.county_names 
-            
-            if country_mask or state_mask or county_mask:  
-                # This will return the coordinate paths that make
-                # up a geometry. 
-                lst_of_paths = feature['geometry']['coordinates']
-                for coord_path in self._parse_lst_of_paths(lst_of_paths): 
-                    self.coord_paths_lst.append(coord_path)
-
-    def _parse_lst_of_paths(self, lst_of_paths): 
-        """Parse a list of coordinate paths. 
-
-        For any lst_of_paths that comes in, do the following: 
-            * parse the coordinate path - this involves making 
-              that the odd shapes that some of the paths are read
-              in as are transformed in such a way that Basemap can 
-              plot them; it also involves grabbing the max/min 
-              lat/long and storing them in `self.lat_pts` and 
-              `self.lng_pts`
-            * yield the parsed coordinate path
+
+        if self.geo_level == 'Country': 
+            feature_ids = index.select(
+                    exclude_state_fips=self.noncontiguous_fips)
+        elif self.geo_level == 'State': 
+            feature_ids = index.select(state_fips=self.state_fips)
+        else: 
+            feature_ids = index.select(state_fips=self.state_fips, 
+                    county_names=self.county_names)
+
+        selected_features = (src[feature_id] for feature_id in feature_ids)
+        self.geometry = GeometryStore.from_features(selected_features)
+
+    def _select_geometry(self, geometry): 
+        """Select the specified geography from already parsed boundaries.
 
         Args: 
         ----
-            lst_of_paths: list of lat/long coordinates 
+            geometry: geometry.GeometryStore
         """
 
-        lst_of_paths = np.array(lst_of_paths)
-        # Occasionally we get a list that has multiple 
-        # lists of paths (unclear why), and the easiest 
-        # way to handle this was to cast it to an 
-        # np.ndarray and flatten it.  
-        if lst_of_paths.shape[0] > 1: 
-            lst_of_paths= lst_of_paths.flatten()
-
-        for coord_path in lst_of_paths: 
-            coord_path_arr = np.array(coord_path)
-            # We don't want to parse the path if it's only 
-            # one dimensional. 
-            if len(coord_path_arr.shape) > 1: 
-                self._parse_coord_path(coord_path_arr)
-            yield np.array(coord_path)
-
-    def _parse_coord_path(self, coord_path_arr): 
-        """Parse a coordinate path. 
-
-        Here we'll actually grab the maximum and minimum latitudes
-        and longitudes that we can find in this particular coordinate
-        path. 
+        state_fips = geometry.properties['STATEFP']
+        if self.geo_level == 'Country': 
+            mask = ~_isin(state_fips, self.noncontiguous_fips)
+        elif self.geo_level == 'State': 
+            mask = _isin(state_fips, self.state_fips)
+        else: 
+            mask = _isin(state_fips, self.state_fips) & \
+                    _isin(geometry.properties['NAME'], self.county_names)
+
+        return geometry.select(mask)
+
+    def _load_index(self, shapefile_path): 
+        """Load the attribute index of the shapefile, building it if need be.
+
+        The index is kept in a sidecar file next to the shapefile. It's 
+        built by reading only the attributes of the features (none of 
+        their geometry), and rebuilt whenever the shapefile changes. If 
+        the sidecar can't be written, the index is just used in memory. 
 
         Args: 
         ----
-            coord_path_arr: numpy.ndarray
+            shapefile_path: str
         """
-        # For a couple of points, the long is switched with the
-        # lat., and so we have to filter those out first. Since
-        # we're in the US, we know that this will be restricted 
-        # to negative longitudes, and positive latitudes. 
-        lng_pts_mask = np.where(coord_path_arr[:, 0] < 0)
-        lat_pts_mask = np.where(coord_path_arr[:, 1] > 0)
-
-        lng_pts_arr = coord_path_arr[lng_pts_mask][:, 0]
-        lat_pts_arr = coord_path_arr[lat_pts_mask][:, 1]
-
-        # The if statements are basically extra checking to make
-        # sure there are no issues/errors. Occasionally with the 
-        # filtering directly above we end up with no lat/long points
-        # in the array. 
-        if lng_pts_arr.shape[0] != 0: 
-            lng_min, lng_max = lng_pts_arr.min(), lng_pts_arr.max()
-            self.lng_pts.extend([lng_min, lng_max])
-        if lat_pts_arr.shape[0] != 0: 
-            lat_min, lat_max = lat_pts_arr.min(), lat_pts_arr.max()
-            self.lat_pts.extend([lat_min, lat_max])
+
+        index_path = os.path.splitext(shapefile_path)[0] + self.index_suffix
+        file_stats = shapefile_stats(shapefile_path)
+        index = ShapefileIndex.load(index_path, file_stats)
+        if index is not None: 
+            return index
+
+        with fiona.open(shapefile_path, ignore_geometry=True) as src: 
+            index = ShapefileIndex.from_properties(
+                    (feature['properties'] for feature in src), file_stats)
+        try: 
+            index.save(index_path)
+        except (IOError, OSError): 
+            pass
+
+        return index
+
+    @property
+    def coord_paths_lst(self): 
+        """List of the parsed coordinate paths (as views of the geometry)."""
+
+        return self.geometry.rings()
 
     def _calc_bounds(self): 
         """This will calculate the min/max lat/long of our map. 
         
-        Use the `self.lng_pts` and `self.lat_pts` lists to calculate 
-        the boundaries for our map. These lists hold the min/max
-        lat/long of each path that was parsed (e.g. a kind of local
-        min/max). Taking the min/max of these lists will give the 
-        overall min/max of the lat/long (e.g. a kind of global min/max). 
+        Take the min/max lat/long over all of the coordinates of the 
+        parsed geometry in a single vectorized pass (see 
+        `GeometryStore.bounds`). 
         """
 
-        lng_pts_arr = np.array(self.lng_pts)
-        lat_pts_arr = np.array(self.lat_pts)
-        
-        self.lat_min, self.lat_max = lat_pts_arr.min(), lat_pts_arr.max()
-        self.lng_min, self.lng_max = lng_pts_arr.min(), lng_pts_arr.max()
+        self.lng_min, self.lat_min, self.lng_max, self.lat_max = \
+                self.geometry.bounds()
         self._center_lng = (self.lng_max - self.lng_min) / 2 + self.lng_min
         self._center_lat = (self.lat_max - self.lat_min) / 2 + self.lat_min
 
@@ -309,56 +455,536 @@ class USMapBuilder(object):
             fig = plt.figure(figsize=self.figsize)
 
         # The first four arguments define the bounds of the box, 
-        # The next two are some standard specs., and the last give 
-        # additional bounds to the box, where to center it, and 
-        # an optional axis to plot on. 
-        self.geo_map = Basemap(llcrnrlon=self._llcrnrlon,
+        # the next two its standard parallels, and the last give 
+        # where to center it, and an optional axis to plot on. 
+        # Basemap also takes some standard specs., and additional 
+        # bounds to the box. 
+        map_kwargs = dict(llcrnrlon=self._llcrnrlon,
                 llcrnrlat=self._llcrnrlat, 
                 urcrnrlon=self._urcrnrlon,
                 urcrnrlat=self._urcrnrlat, 
-                resolution='l', projection='aea',
                 lat_1=self.lat_min, lat_2=self.lat_max, 
-                lon_1=self.lng_min, lon_2=self.lng_max, 
                 lon_0=self._center_lng, lat_0=self._center_lat, 
                 ax=self.ax)
+        if self.projection_backend == 'numpy': 
+            self.geo_map = AlbersProjection(**map_kwargs)
+        else: 
+            Basemap = _import_basemap()
+            self.geo_map = Basemap(resolution='l', projection='aea', 
+                    lon_1=self.lng_min, lon_2=self.lng_max, **map_kwargs)
     
     def _plot_map(self): 
-        """Plot the paths on the initialized map."""
-
-        for feat in self.coord_paths_lst: 
-            # Even though I put the data into 2D format before using it,
-            # there were still a couple of 3D data points that lead to issues.
-            # Ignoring them didn't seem to cause any problems. 
-            if len(feat.shape) == 3:
-                rows, cols = feat.shape[1], feat.shape[2]
-                feat = feat.reshape(rows, cols)
-            if len(feat.shape) > 1: 
-                poly = self.geo_map(feat[:, 0], feat[:, 1])
-                self.geo_map.plot(poly[0], poly[1], color='black')
-
-    def plot_points(self, points, markersize=8): 
+        """Plot the paths on the initialized map.
+
+        Rather than projecting and plotting each path on its own, 
+        project the coordinates of every path in a single call, and 
+        draw all of the paths as one collection (a LineCollection, 
+        or a PolyCollection if they're filled). 
+        """
+
+        self._simplify_geometry()
+        if self.display_geometry.n_rings == 0: 
+            return
+
+        segments = np.split(self._project_coords(), 
+                self.display_geometry.ring_offsets[1:-1])
+
+        if self.fill_color is None: 
+            self.boundary_collection = LineCollection(segments, 
+                    colors=self.boundary_color, 
+                    linewidths=self.boundary_width)
+        else: 
+            self.boundary_collection = PolyCollection(segments, 
+                    facecolors=self.fill_color, 
+                    edgecolors=self.boundary_color, 
+                    linewidths=self.boundary_width)
+
+        ax = self.geo_map._check_ax()
+        ax.add_collection(self.boundary_collection)
+        self.geo_map.set_axes_limits(ax=ax)
+
+    def _simplify_geometry(self): 
+        """Simplify the parsed geometry to the level of detail to draw at.
+
+        The simplified geometry is stored in `self.display_geometry` 
+        (which is just `self.geometry` if there's no tolerance). If 
+        there's a cache, it's loaded from it, or stored in it, keyed 
+        by the tolerance. 
+        """
+
+        self.display_geometry = self.geometry
+        self._display_cache_key = self._cache_key
+
+        tolerance = self.simplify_tolerance
+        if tolerance == 'auto': 
+            tolerance = self._calc_pixel_size() / 2.
+        if not tolerance: 
+            return
+
+        if self.cache is not None: 
+            self._display_cache_key = GeometryCache.derive_key(
+                    self._cache_key, simplify_tolerance=tolerance)
+            self.display_geometry = self.cache.load(self._display_cache_key)
+            if self.display_geometry is not None: 
+                return
+
+        self.display_geometry = self.geometry.simplify(tolerance)
+        if self.cache is not None: 
+            self.cache.store(self._display_cache_key, self.display_geometry)
+
+    def _calc_pixel_size(self): 
+        """Calculate the width of a pixel of the map, in degrees of longitude."""
+
+        ax = self.geo_map._check_ax()
+        dpi = self.dpi or ax.figure.dpi
+        n_pixels = ax.figure.get_size_inches()[0] * dpi * \
+                ax.get_position().width
+
+        return (self._urcrnrlon - self._llcrnrlon) / n_pixels
+
+    def _project_coords(self): 
+        """Project the coordinates of the geometry to draw onto the map.
+
+        If there's a cache, the projected coordinates are loaded from 
+        it, or stored in it, keyed by the parameters of the map. 
+        """
+
+        if self.cache is not None: 
+            projection_params = [float(param) for param in (
+                self._llcrnrlon, self._llcrnrlat, self._urcrnrlon, 
+                self._urcrnrlat, self.lat_min, self.lat_max, self.lng_min, 
+                self.lng_max, self._center_lng, self._center_lat)]
+            proj_coords = self.cache.load_projected(self._display_cache_key, 
+                    projection_params)
+            if proj_coords is not None: 
+                return proj_coords
+
+        coords = self.display_geometry.coords
+        proj_x, proj_y = self.geo_map(coords[:, 0], coords[:, 1])
+        proj_coords = np.column_stack([proj_x, proj_y])
+
+        if self.cache is not None: 
+            self.cache.store_projected(self._display_cache_key, 
+                    projection_params, proj_coords)
+
+        return proj_coords
+
+    def locate_points(self, lngs, lats, n_jobs=1): 
+        """Find the boundary (e.g. state or county) each point falls in.
+
+        The spatial index of the parsed boundaries is built on the first 
+        call, and reused after (see `spatial.spatial_join`). 
+
+        Args: 
+        ----
+            lngs: 1d numpy.ndarray of floats
+            lats: 1d numpy.ndarray of floats
+            n_jobs (optional): int
+                Number of processes to split the points between. 
+
+        Returns: 
+        ----
+            feature_idx: 1d numpy.ndarray of ints
+                Holds the index of each point's boundary in 
+                `self.geometry`, or -1 if it isn't in any. 
+            properties: dict of 1d numpy.ndarrays
+                Holds the STATEFP, NAME, and GEOID of each point's 
+                boundary (None if it isn't in any). 
+        """
+
+        if self._spatial_index is None: 
+            self._spatial_index = SpatialIndex(self.geometry)
+        feature_idx = spatial_join(self.geometry, lngs, lats, n_jobs=n_jobs, 
+                index=self._spatial_index)
+
+        found = feature_idx >= 0
+        properties = {}
+        for name, values in self.geometry.properties.items(): 
+            point_values = np.full(feature_idx.shape[0], None, dtype=object)
+            point_values[found] = values[feature_idx[found]]
+            properties[name] = point_values
+
+        return feature_idx, properties
+
+    def plot_choropleth(self, values, key='GEOID', cmap='viridis', 
+            vmin=None, vmax=None, missing_color='lightgrey', colorbar=False, 
+            **kwargs): 
+        """Fill each boundary with a color based off of its value.
+
+        All of the boundaries are drawn as a single PathCollection, with 
+        one (compound) path per feature, so that the holes and separate 
+        parts of a boundary all take its color. The collection is built 
+        on the first call. Calling again with new values just re-colors 
+        it, without rebuilding anything. 
+
+        Args: 
+        ----
+            values: dict or pandas Series 
+                Holds the value of each boundary, keyed by its `key` 
+                property (e.g. its state or county FIPS code, as a str). 
+            key (optional): str 
+                Holds the property to join the values on ('GEOID', 
+                'STATEFP', or 'NAME'). 
+            cmap (optional): str or matplotlib Colormap 
+                Only used when the collection is built. 
+            vmin (optional): float 
+            vmax (optional): float 
+                Hold the range of values to map to colors. They default 
+                to the min/max of the values. 
+            missing_color (optional): str 
+                Holds the color to fill boundaries without a value with. 
+                Only used when the collection is built. 
+            colorbar (optional): bool 
+                Whether to add a colorbar. Only used when the collection 
+                is built. 
+            kwargs: passed on to PathCollection when it's built 
+
+        Returns: 
+        ----
+            matplotlib.collections.PathCollection 
+        """
+
+        geometry = self.display_geometry
+        feature_values = np.array([values.get(feature_key, np.nan) 
+            for feature_key in geometry.properties[key]], dtype=np.float64)
+        feature_values = np.ma.masked_invalid(feature_values)
+
+        if self.choropleth_collection is None: 
+            cmap = copy.copy(plt.get_cmap(cmap))
+            cmap.set_bad(missing_color)
+            kwargs.setdefault('edgecolors', 'none')
+            self.choropleth_collection = PathCollection(
+                    self._build_feature_paths(), cmap=cmap, **kwargs)
+            ax = self.geo_map._check_ax()
+            ax.add_collection(self.choropleth_collection)
+            self.geo_map.set_axes_limits(ax=ax)
+            if colorbar: 
+                plt.colorbar(self.choropleth_collection, ax=ax)
+
+        self.choropleth_collection.set_array(feature_values)
+        if feature_values.count(): 
+            vmin = feature_values.min() if vmin is None else vmin
+            vmax = feature_values.max() if vmax is None else vmax
+        self.choropleth_collection.set_clim(vmin, vmax)
+
+        return self.choropleth_collection
+
+    def _build_feature_paths(self): 
+        """Build a compound path of the projected rings of each feature."""
+
+        geometry = self.display_geometry
+        proj_coords = np.asarray(self._project_coords())
+        codes = np.full(proj_coords.shape[0], Path.LINETO, 
+                dtype=Path.code_type)
+        codes[geometry.ring_offsets[:-1]] = Path.MOVETO
+
+        coord_offsets = geometry.ring_offsets[geometry.feature_ring_offsets()]
+        return [Path(proj_coords[start:stop], codes[start:stop]) for 
+                start, stop in zip(coord_offsets[:-1], coord_offsets[1:])]
+
+    def plot_points(self, points, markersize=8, mode='markers', 
+            gridsize=100, **kwargs): 
         """Plot the inputted points on the self.geo_map stored on the class
 
+        All of the points are projected onto the map in a single call. 
+        In the default 'markers' mode, they're grouped by marker, and 
+        each group is drawn as a single (marker only) line. For very 
+        large numbers of points, they can instead be aggregated into a 
+        'hexbin' or 'hist2d' of their density, in projected space. 
+
         Args: 
         ----
-            points: iterable of lat/long/color pairs 
+            points: iterable of lat/long/color pairs, 2d numpy.ndarray, 
+                    or pandas DataFrame 
                 The input here should be an iterable, where each item contains
                 the lat/long of a point to plot, along with the color of the
-                marker that should be used to plot it. 
+                marker that should be used to plot it. It can also be an 
+                array with a long and lat column (and optionally a marker 
+                column), or a DataFrame with 'lon', 'lat' and (optionally) 
+                'marker' columns. Points without a marker are drawn with 
+                'bo'. 
+            markersize (optional): int 
+            mode (optional): str 
+                One of 'markers', 'hexbin', or 'hist2d'. 
+            gridsize (optional): int 
+                Holds the number of hexagons/bins across the map in the 
+                'hexbin' and 'hist2d' modes. 
+            kwargs: passed on to the matplotlib plot/hexbin/hist2d call 
+
+        Returns: 
+        ----
+            The list of lines drawn in the 'markers' mode, or the 
+            PolyCollection/QuadMesh drawn in the 'hexbin'/'hist2d' mode. 
+        """
+
+        lons, lats, markers = self._unpack_points(points)
+        x, y = self.geo_map(lons, lats)
+        ax = self.geo_map._check_ax()
+
+        if mode == 'markers': 
+            unique_markers, marker_idx = np.unique(markers, 
+                    return_inverse=True)
+            artists = []
+            for group_idx, marker in enumerate(unique_markers): 
+                in_group = marker_idx == group_idx
+                artists.extend(ax.plot(x[in_group], y[in_group], marker, 
+                    markersize=markersize, linestyle='None', **kwargs))
+        elif mode == 'hexbin': 
+            artists = ax.hexbin(x, y, gridsize=gridsize, mincnt=1, **kwargs)
+        elif mode == 'hist2d': 
+            artists = ax.hist2d(x, y, bins=gridsize, cmin=1, **kwargs)[3]
+        else: 
+            raise ValueError("mode must be one of 'markers', 'hexbin', or "
+                    "'hist2d'.")
+
+        self.geo_map.set_axes_limits(ax=ax)
+        return artists
+
+    def _unpack_points(self, points): 
+        """Unpack the points to plot into arrays of long, lat, and marker.
+
+        Args: 
+        ----
+            points: iterable of lat/long/color pairs, 2d numpy.ndarray, 
+                    or pandas DataFrame 
+                See `plot_points`. 
+        """
+
+        if hasattr(points, 'columns'): 
+            lons = points['lon'].values
+            lats = points['lat'].values
+            markers = points['marker'].values if 'marker' in points.columns \
+                    else None
+        elif isinstance(points, np.ndarray) and points.dtype != object: 
+            lons, lats = points[:, 0], points[:, 1]
+            markers = None
+        else: 
+            points = list(points)
+            lons = [point[0] for point in points]
+            lats = [point[1] for point in points]
+            markers = [point[2] for point in points]
+
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        if markers is None: 
+            markers = np.full(lons.shape[0], 'bo', dtype=object)
+        markers = np.asarray(markers).astype(str)
+
+        return lons, lats, markers
+
+    def cache_background(self, extra_key=None): 
+        """Render the map once, to use as the background of frames.
+
+        The rendered figure is cached in memory (shared between 
+        builders), and on disk if there's a cache, keyed by the 
+        parameters of the map, the style of the boundaries, and the 
+        size of the figure. If it's already cached, it's drawn from 
+        the cache instead of re-drawing the boundaries. The figure's 
+        canvas must support blitting (e.g. the Agg backend). 
+
+        Anything else drawn on the figure before this is called (e.g. 
+        a choropleth or title) is part of the background, so it should 
+        be keyed by `extra_key`. 
+
+        Args: 
+        ----
+            extra_key (optional): JSON serializable 
+                Holds anything else that determines the background 
+                (e.g. the values of a choropleth drawn on it). 
+        """
+
+        ax = self.geo_map._check_ax()
+        fig = ax.figure
+        canvas = fig.canvas
+        if not hasattr(canvas, 'copy_from_bbox'): 
+            raise ValueError('Caching the background requires a canvas '
+                    'that supports blitting (e.g. the Agg backend).')
+
+        background_key, raster_params = self._calc_background_key(ax, 
+                extra_key)
+        background = self._backgrounds.pop(background_key, None)
+        if background is None and self.cache is not None and \
+                self._display_cache_key is not None: 
+            background = self.cache.load_raster(self._display_cache_key, 
+                    raster_params)
+
+        if background is None: 
+            canvas.draw()
+            background = np.array(canvas.buffer_rgba())
+            if self.cache is not None and self._display_cache_key is not None: 
+                self.cache.store_raster(self._display_cache_key, 
+                        raster_params, background)
+        else: 
+            # Draw the cached pixels in place of the figure, and put 
+            # the figure back once they're copied. 
+            visible_axes = [fig_ax for fig_ax in fig.axes 
+                    if fig_ax.get_visible()]
+            for fig_ax in visible_axes: 
+                fig_ax.set_visible(False)
+            image = fig.figimage(np.asarray(background), origin='upper')
+            try: 
+                canvas.draw()
+            finally: 
+                image.remove()
+                for fig_ax in visible_axes: 
+                    fig_ax.set_visible(True)
+
+        self._backgrounds[background_key] = background
+        while len(self._backgrounds) > self.background_cache_size: 
+            self._backgrounds.popitem(last=False)
+        self._background = canvas.copy_from_bbox(fig.bbox)
+
+    def _calc_background_key(self, ax, extra_key): 
+        """Build the keys the background of the map is cached by.
+
+        Args: 
+        ----
+            ax: matplotlib.pyplot.Axes object 
+            extra_key: JSON serializable 
+
+        Returns: 
+        ----
+            background_key: str 
+                Holds the key of the background in memory. 
+            raster_params: list 
+                Holds the parameters of the background, which key it 
+                on disk, under the entry of the drawn geometry. 
+        """
+
+        raster_params = [[float(param) for param in (self._llcrnrlon, 
+            self._llcrnrlat, self._urcrnrlon, self._urcrnrlat, self.lat_min, 
+            self.lat_max, self.lng_min, self.lng_max, self._center_lng, 
+            self._center_lat)], self.projection_backend, 
+            str(self.boundary_color), float(self.boundary_width), 
+            str(self.fill_color), list(ax.figure.canvas.get_width_height()), 
+            float(ax.figure.dpi), list(ax.get_position().bounds), extra_key]
+
+        geometry_key = self._display_cache_key
+        if geometry_key is None: 
+            geometry_hash = hashlib.sha1(np.ascontiguousarray(
+                self.display_geometry.coords))
+            geometry_hash.update(np.ascontiguousarray(
+                self.display_geometry.ring_offsets))
+            geometry_key = geometry_hash.hexdigest()
+
+        return GeometryCache.derive_key(geometry_key, 
+                raster_params=raster_params), raster_params
+
+    def iter_frames(self, frames, mode='markers', **kwargs): 
+        """Draw each of a sequence of sets of points over the map.
+
+        The map is rendered once (see `cache_background`), and each 
+        frame restores it and draws only its points, by blitting. The 
+        points of a frame are removed once the next one is drawn. 
+
+        Args: 
+        ----
+            frames: iterable 
+                Holds the points of each frame, in any of the formats 
+                `plot_points` takes. 
+            mode (optional): str 
+                One of 'markers', 'hexbin', or 'hist2d' (see 
+                `plot_points`). 
+            kwargs: passed on to `plot_points` 
+
+        Yields: 
+        ----
+            3d numpy.ndarray holding the RGBA pixels of each frame. It's 
+            a view of the canvas, so it's overwritten by the next frame. 
         """
 
-        for point in points: 
-            lon, lat, marker = point[0], point[1], point[2]
-            # This line translates it to the x, y space of the 
-            # self.geo_map. 
-            x, y = self.geo_map(lon, lat)
-            self.geo_map.plot(x, y, marker, markersize=markersize)
+        ax = self.geo_map._check_ax()
+        canvas = ax.figure.canvas
+        if self._background is None: 
+            self.cache_background()
+
+        for points in frames: 
+            canvas.restore_region(self._background)
+            artists = self.plot_points(points, mode=mode, **kwargs)
+            artists = artists if mode == 'markers' else [artists]
+            try: 
+                for artist in artists: 
+                    ax.draw_artist(artist)
+                canvas.blit(ax.figure.bbox)
+                yield np.asarray(canvas.buffer_rgba())
+            finally: 
+                for artist in artists: 
+                    artist.remove()
+
+    def render_frames(self, frames, output_path, fps=10, mode='markers', 
+            **kwargs): 
+        """Render each of a sequence of sets of points over the map to a file.
+
+        The boundaries are drawn only once (see `iter_frames`), and each 
+        frame's pixels are written straight from the canvas, without 
+        re-rendering the figure. 
+
+        Args: 
+        ----
+            frames: iterable 
+                Holds the points of each frame (see `plot_points`). 
+            output_path: str 
+                Holds a directory to save each frame to, as 
+                frame_<number>.png, or the path of an animation to write. 
+                A .gif is written with Pillow (which holds every frame in 
+                memory until it's written); any other format is streamed 
+                to ffmpeg (see matplotlib's animation.ffmpeg_path). 
+            fps (optional): int 
+                Holds the frames per second of the animation. 
+            mode (optional): str 
+            kwargs: passed on to `plot_points` 
+
+        Returns: 
+        ----
+            int holding the number of frames rendered. 
+        """
+
+        frame_iter = self.iter_frames(frames, mode=mode, **kwargs)
+        n_frames = 0
+
+        if not os.path.splitext(output_path)[1]: 
+            if not os.path.isdir(output_path): 
+                os.makedirs(output_path)
+            for n_frames, frame in enumerate(frame_iter, 1): 
+                plt.imsave(os.path.join(output_path, 
+                    'frame_{0:05d}.png'.format(n_frames - 1)), frame)
+        elif output_path.lower().endswith('.gif'): 
+            from PIL import Image
+            images = [Image.fromarray(np.array(frame)) for frame in frame_iter]
+            n_frames = len(images)
+            if images: 
+                images[0].save(output_path, save_all=True, 
+                        append_images=images[1:], duration=1000. / fps, 
+                        loop=0)
+        else: 
+            width, height = self.geo_map._check_ax().figure.canvas.\
+                    get_width_height()
+            # Pad to even dimensions, which the yuv420p pixel format 
+            # (needed by most players) requires. 
+            proc = subprocess.Popen([matplotlib.rcParams[
+                'animation.ffmpeg_path'], '-y', '-loglevel', 'error', 
+                '-f', 'rawvideo', '-pix_fmt', 'rgba', 
+                '-s', '{0}x{1}'.format(width, height), '-r', str(fps), 
+                '-i', 'pipe:', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', 
+                '-pix_fmt', 'yuv420p', output_path], stdin=subprocess.PIPE)
+            try: 
+                for n_frames, frame in enumerate(frame_iter, 1): 
+                    proc.stdin.write(np.ascontiguousarray(frame).tobytes())
+            finally: 
+                proc.stdin.close()
+                if proc.wait() != 0: 
+                    raise IOError('ffmpeg failed to write {0}.'.format(
+                        output_path))
+
+        return n_frames
 
     def plot_boundary(self, filepath): 
         """Plot the inputted boundary on the initialized map.
 
         Use the `readshapefile` method available on a Basemap object
-        to plot any boundaries given in the filepath. 
+        to plot any boundaries given in the filepath (or, with the 
+        'numpy' projection_backend, parse and draw them as a single 
+        LineCollection). 
         
         Args: 
         ----
@@ -367,7 +993,169 @@ class USMapBuilder(object):
                 boundaries to plot on the map. 
         """
 
-        self.geo_map.readshapefile(filepath, name='Filepath boundaries', 
-                color='blue')
+        if self.projection_backend == 'basemap': 
+            self.geo_map.readshapefile(filepath, name='Filepath boundaries', 
+                    color='blue')
+            return
+
+        with fiona.open(filepath) as src: 
+            geometry = GeometryStore.from_features(src)
+        proj_x, proj_y = self.geo_map(geometry.coords[:, 0], 
+                geometry.coords[:, 1])
+        segments = np.split(np.column_stack([proj_x, proj_y]), 
+                geometry.ring_offsets[1:-1])
+        ax = self.geo_map._check_ax()
+        ax.add_collection(LineCollection(segments, colors='blue', 
+            linewidths=0.5))
+        self.geo_map.set_axes_limits(ax=ax)
+
+def plot_small_multiples(shapefile_path, groups='State', output_dir=None, 
+        axes=None, n_jobs=1, figsize=(8, 6), image_format='png', 
+        **builder_kwargs): 
+    """Build a map of each of a set of groups of states from one shapefile.
+
+    The shapefile is read and parsed once, and each map's boundaries 
+    (and so its bounds) are selected from the shared geometry. Each 
+    map is either saved to a file, or drawn on one of a set of axes 
+    (e.g. a grid from `plt.subplots`). 
+
+    Args: 
+    ----
+        shapefile_path: str 
+        groups (optional): str or dict 
+            Holds 'State' for a map per state, 'Region' for a map per 
+            region of `USMapBuilder.regions_dict`, or a dict of map name 
+            to the state names in it. 
+        output_dir (optional): str 
+            Holds a directory to save the maps to, as <name>.<format>. 
+        axes (optional): iterable of matplotlib.pyplot.Axes objects 
+            Holds the axes to draw the maps on, in order, if they're 
+            not saved to files. A 2d grid of axes is drawn on row by 
+            row. There must be at least as many axes as maps. 
+        n_jobs (optional): int 
+            Number of processes to render the maps with (on a 
+            non-interactive backend), when saving them to files. -1 
+            uses all of the available cores. 
+        figsize (optional): tuple of ints 
+        image_format (optional): str 
+        builder_kwargs: passed on to each USMapBuilder 
+
+    Returns: 
+    ----
+        dict of map name to the path of the file it was saved to, or 
+        to its USMapBuilder if it was drawn on `axes`. 
+    """
+
+    if (output_dir is None) == (axes is None): 
+        raise ValueError('Exactly one of output_dir and axes must be given.')
+
+    with fiona.open(shapefile_path) as src: 
+        geometry = GeometryStore.from_features(src)
+
+    if groups == 'State': 
+        present_fips = set(geometry.properties['STATEFP'])
+        groups = dict((state_name, [state_name]) for state_name, fips in 
+                USMapBuilder.fips_dict.items() if fips in present_fips)
+    elif groups == 'Region': 
+        groups = USMapBuilder.regions_dict
+
+    map_args = []
+    for map_name in sorted(groups): 
+        state_names = groups[map_name]
+        state_fips = set(USMapBuilder.fips_dict[state_name] for state_name 
+                in state_names)
+        map_geometry = geometry.select(_isin(geometry.properties['STATEFP'], 
+            state_fips))
+        map_args.append((map_name, state_names, map_geometry, 
+            builder_kwargs))
 
+    if axes is not None: 
+        axes = np.ravel(axes)
+        if len(axes) < len(map_args): 
+            raise ValueError('Got {0} axes for {1} maps.'.format(len(axes), 
+                len(map_args)))
+        builders = {}
+        for ax, (map_name, state_names, map_geometry, kwargs) in \
+                zip(axes, map_args): 
+            builders[map_name] = USMapBuilder(None, geo_level='State', 
+                    state_names=state_names, geometry=map_geometry, ax=ax, 
+                    **kwargs)
+            ax.set_title(map_name)
+        return builders
+
+    if not os.path.isdir(output_dir): 
+        os.makedirs(output_dir)
+    image_paths = dict((map_name, os.path.join(output_dir, 
+        '{0}.{1}'.format(map_name, image_format))) 
+        for map_name, _, _, _ in map_args)
+    render_args = [args + (image_paths[args[0]], figsize) 
+            for args in map_args]
+
+    n_jobs = multiprocessing.cpu_count() if n_jobs == -1 else n_jobs
+    if n_jobs > 1 and len(render_args) > 1: 
+        pool = multiprocessing.Pool(min(n_jobs, len(render_args)), 
+                initializer=_init_worker)
+        try: 
+            pool.map(_render_map, render_args)
+        finally: 
+            pool.close()
+            pool.join()
+    else: 
+        backend = matplotlib.get_backend()
+        _init_worker()
+        try: 
+            for args in render_args: 
+                _render_map(args)
+        finally: 
+            plt.switch_backend(backend)
+
+    return image_paths
+
+def _import_basemap(): 
+    """Import Basemap (only once), or return None if it isn't installed."""
+
+    if 'Basemap' not in _basemap: 
+        try: 
+            from mpl_toolkits.basemap import Basemap
+        except ImportError: 
+            Basemap = None
+        _basemap['Basemap'] = Basemap
+
+    return _basemap['Basemap']
+
+def _init_worker(): 
+    """Switch a rendering process to a non-interactive backend."""
+
+    plt.switch_backend('Agg')
+
+def _render_map(args): 
+    """Render one map of `plot_small_multiples` to an image file.
+
+    Args: 
+    ----
+        args: tuple
+            Holds the map name, its state names, its geometry, the 
+            USMapBuilder kwargs, the path to save it to, and the 
+            figure size. 
+    """
+
+    map_name, state_names, map_geometry, kwargs, image_path, figsize = args
+
+    fig, ax = plt.subplots(1, 1, figsize=figsize)
+    USMapBuilder(None, geo_level='State', state_names=state_names, 
+            geometry=map_geometry, ax=ax, **kwargs)
+    ax.set_title(map_name)
+    fig.savefig(image_path)
+    plt.close(fig)
+
+def _isin(values, allowed): 
+    """Check which of the values are in a set of allowed values.
+
+    Args: 
+    ----
+        values: 1d numpy.ndarray of objects 
+        allowed: set 
+    """
 
+    allowed = set(allowed)
+    return np.array([value in allowed for value in values], dtype=bool)
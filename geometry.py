@@ -0,0 +1,784 @@
+"""A compact store of parsed shapefile geometry.
+
+This module contains the `GeometryStore` class, which holds the
+polygons of a set of shapefile features in flat numpy arrays rather
+than as nested lists of per-path arrays. Every coordinate of every
+ring lives in one contiguous (n, 2) float buffer, and three offset
+arrays record where each ring, part (polygon), and feature starts:
+
+    * ring_offsets[i]:ring_offsets[i + 1] are the rows of `coords`
+      that make up ring i
+    * part_offsets[j]:part_offsets[j + 1] are the rings that make up
+      part j (its exterior, followed by any holes)
+    * feature_offsets[k]:feature_offsets[k + 1] are the parts that
+      make up feature k (one for a Polygon, many for a MultiPolygon)
+
+Holding the geometry this way makes most operations (bounds,
+selection, projection) a handful of vectorized numpy calls over
+the whole buffer. It also makes it cheap to save to disk and load
+back memory mapped, which the `GeometryCache` class does.
+
+The `ShapefileIndex` class maps the attributes that features are
+selected by (STATEFP, NAME) to the ids of the features that hold
+them, so that only the selected features of a shapefile need to be
+read.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+class GeometryStore(object):
+    """Flat, offset indexed store of the polygons of shapefile features.
+
+    Args:
+        coords: 2d numpy.ndarray of floats
+            Holds the lng/lat of every vertex of every ring.
+        ring_offsets: 1d numpy.ndarray of ints
+        part_offsets: 1d numpy.ndarray of ints
+        feature_offsets: 1d numpy.ndarray of ints
+            See the module docstring.
+        properties: dict of 1d numpy.ndarrays
+            Holds the value of each property per feature.
+    """
+
+    property_names = ('STATEFP', 'NAME', 'GEOID')
+
+    def __init__(self, coords, ring_offsets, part_offsets, feature_offsets,
+            properties):
+        self.coords = coords
+        self.ring_offsets = ring_offsets
+        self.part_offsets = part_offsets
+        self.feature_offsets = feature_offsets
+        self.properties = properties
+        self._simplified = {}
+
+    @classmethod
+    def from_features(cls, features):
+        """Build the store from an iterable of (fiona) features.
+
+        Polygon and MultiPolygon geometries are unpacked explicitly,
+        according to their type. Each ring is cut down to its lng/lat
+        columns (some 2D shapefiles still hold the odd 3D point), and
+        any other geometry types are skipped.
+
+        Args:
+            features: iterable of GeoJSON-like dicts
+        """
+
+        rings, ring_lengths, part_lengths, feature_lengths = [], [], [], []
+        properties = dict((name, []) for name in cls.property_names)
+
+        for feature in features:
+            geometry = feature['geometry']
+            if geometry is None:
+                continue
+            if geometry['type'] == 'Polygon':
+                parts = [geometry['coordinates']]
+            elif geometry['type'] == 'MultiPolygon':
+                parts = geometry['coordinates']
+            else:
+                continue
+
+            n_parts = 0
+            for part in parts:
+                n_rings = 0
+                for ring in part:
+                    ring_arr = np.asarray(ring, dtype=np.float64)
+                    if ring_arr.ndim != 2 or ring_arr.shape[0] < 2:
+                        continue
+                    rings.append(ring_arr[:, :2])
+                    ring_lengths.append(ring_arr.shape[0])
+                    n_rings += 1
+                if n_rings:
+                    part_lengths.append(n_rings)
+                    n_parts += 1
+            if not n_parts:
+                continue
+
+            feature_lengths.append(n_parts)
+            for name in cls.property_names:
+                properties[name].append(feature['properties'].get(name))
+
+        coords = np.concatenate(rings) if rings else np.zeros((0, 2))
+        properties = dict((name, np.array(values, dtype=object))
+                for name, values in properties.items())
+
+        return cls(coords, _lengths_to_offsets(ring_lengths),
+                _lengths_to_offsets(part_lengths),
+                _lengths_to_offsets(feature_lengths), properties)
+
+    @property
+    def n_features(self):
+        """Number of features in the store."""
+
+        return self.feature_offsets.shape[0] - 1
+
+    @property
+    def n_rings(self):
+        """Number of rings in the store."""
+
+        return self.ring_offsets.shape[0] - 1
+
+    def rings(self):
+        """Return a list of the rings, as views into `coords`."""
+
+        return np.split(self.coords, self.ring_offsets[1:-1])
+
+    def ring_feature_idx(self):
+        """Return the index of the feature that each ring belongs to."""
+
+        rings_per_feature = np.diff(self.part_offsets[self.feature_offsets])
+        return np.repeat(np.arange(self.n_features), rings_per_feature)
+
+    def feature_ring_offsets(self):
+        """Return the offsets of each feature's rings (as ring indices)."""
+
+        return self.part_offsets[self.feature_offsets]
+
+    def ring_bounds(self):
+        """Calculate the bounding box of every ring.
+
+        Returns:
+            2d numpy.ndarray with a (lng_min, lat_min, lng_max,
+            lat_max) row per ring.
+        """
+
+        if self.n_rings == 0:
+            return np.zeros((0, 4))
+
+        starts = self.ring_offsets[:-1]
+        mins = np.minimum.reduceat(self.coords, starts, axis=0)
+        maxs = np.maximum.reduceat(self.coords, starts, axis=0)
+
+        return np.column_stack([mins, maxs])
+
+    def feature_bounds(self):
+        """Calculate the bounding box of every feature.
+
+        Returns:
+            2d numpy.ndarray with a (lng_min, lat_min, lng_max,
+            lat_max) row per feature.
+        """
+
+        ring_bounds = self.ring_bounds()
+        if self.n_features == 0:
+            return np.zeros((0, 4))
+
+        starts = self.feature_ring_offsets()[:-1]
+        mins = np.minimum.reduceat(ring_bounds[:, :2], starts, axis=0)
+        maxs = np.maximum.reduceat(ring_bounds[:, 2:], starts, axis=0)
+
+        return np.column_stack([mins, maxs])
+
+    def bounds(self):
+        """Calculate the min/max lng/lat over all of the coordinates.
+
+        For a couple of points in the census shapefiles, the long is
+        switched with the lat., and so those are filtered out first.
+        Since we're in the US, we know that this will be restricted to
+        negative longitudes, and positive latitudes.
+
+        Raises a ValueError if there are no such coordinates.
+
+        Returns:
+            lng_min, lat_min, lng_max, lat_max: floats
+        """
+
+        lng_pts = self.coords[:, 0]
+        lat_pts = self.coords[:, 1]
+        lng_pts = lng_pts[lng_pts < 0]
+        lat_pts = lat_pts[lat_pts > 0]
+
+        return lng_pts.min(), lat_pts.min(), lng_pts.max(), lat_pts.max()
+
+    def simplify(self, tolerance):
+        """Return a simplified copy of the store, for drawing at low detail.
+
+        Details smaller than roughly `tolerance` (in the units of the
+        coordinates) are removed, while the borders shared between
+        features are kept identical (see `_simplify_mask`). Results
+        are kept per tolerance, so asking again is free.
+
+        Args:
+            tolerance: float
+        """
+
+        if tolerance not in self._simplified:
+            keep = _simplify_mask(self.coords, self.ring_offsets, tolerance)
+            ring_idx = np.repeat(np.arange(self.n_rings), 
+                    np.diff(self.ring_offsets))
+            ring_lengths = np.bincount(ring_idx[keep], 
+                    minlength=self.n_rings)
+            self._simplified[tolerance] = GeometryStore(self.coords[keep],
+                    _lengths_to_offsets(ring_lengths), self.part_offsets,
+                    self.feature_offsets, self.properties)
+
+        return self._simplified[tolerance]
+
+    def select(self, feature_idx):
+        """Return a new store holding only a subset of the features.
+
+        Args:
+            feature_idx: 1d numpy.ndarray
+                Holds the indices of the features to keep, or a
+                boolean mask over the features.
+        """
+
+        feature_idx = np.arange(self.n_features)[feature_idx]
+
+        part_idx = _ranges(self.feature_offsets[feature_idx],
+                self.feature_offsets[feature_idx + 1])
+        ring_idx = _ranges(self.part_offsets[part_idx],
+                self.part_offsets[part_idx + 1])
+        coord_idx = _ranges(self.ring_offsets[ring_idx],
+                self.ring_offsets[ring_idx + 1])
+
+        feature_lengths = np.diff(self.feature_offsets)[feature_idx]
+        part_lengths = np.diff(self.part_offsets)[part_idx]
+        ring_lengths = np.diff(self.ring_offsets)[ring_idx]
+        properties = dict((name, values[feature_idx]) for name, values
+                in self.properties.items())
+
+        return GeometryStore(self.coords[coord_idx],
+                _lengths_to_offsets(ring_lengths),
+                _lengths_to_offsets(part_lengths),
+                _lengths_to_offsets(feature_lengths), properties)
+
+class GeometryCache(object):
+    """On-disk cache of parsed (and projected) geometry.
+
+    Each entry is a directory holding the arrays of a GeometryStore as
+    .npy files, and its properties as JSON. Entries are loaded memory
+    mapped, so a load costs next to nothing up front, and processes
+    loading the same entry share its pages. Projected coordinates, and
+    rasters rendered from them, can be stored alongside an entry, keyed
+    by the parameters they were built with.
+    Once the cache holds more than `max_bytes`, the least recently
+    used entries are evicted.
+
+    Args:
+        cache_dir: str
+            Holds the directory to keep the cache in. It's created if
+            it doesn't exist.
+        max_bytes (optional): int
+    """
+
+    array_names = ('coords', 'ring_offsets', 'part_offsets',
+            'feature_offsets')
+
+    def __init__(self, cache_dir, max_bytes=2 ** 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        if not os.path.isdir(cache_dir):
+            try:
+                os.makedirs(cache_dir)
+            except OSError:
+                if not os.path.isdir(cache_dir):
+                    raise
+
+    @staticmethod
+    def make_key(shapefile_path, **selection):
+        """Build the cache key of a shapefile and a selection from it.
+
+        The key changes whenever the shapefile (or its .dbf of
+        attributes) is modified, since it includes their sizes and
+        modification times.
+
+        Args:
+            shapefile_path: str
+            selection: keyword arguments of JSON serializable values
+                (or sets of them) that determine what was parsed from
+                the shapefile, e.g. the geo_level and selected states.
+        """
+
+        file_stats = shapefile_stats(shapefile_path)
+        selection = dict((name, sorted(value) if isinstance(value, 
+            (set, frozenset, list, tuple)) else value) for name, value
+            in selection.items())
+        key_data = json.dumps([os.path.abspath(shapefile_path), file_stats,
+            selection], sort_keys=True)
+
+        return hashlib.sha1(key_data.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def make_geometry_key(cls, geometry, **selection):
+        """Build the cache key of geometry that wasn't read from a shapefile.
+
+        The key is a hash of the arrays and properties of the geometry
+        (along with the selection), so it changes whenever they do.
+
+        Args:
+            geometry: GeometryStore
+            selection: keyword arguments of JSON serializable values
+                (or sets of them), as in `make_key`.
+        """
+
+        geometry_hash = hashlib.sha1()
+        for name in cls.array_names:
+            array = np.ascontiguousarray(getattr(geometry, name))
+            geometry_hash.update(str(array.dtype).encode('utf-8'))
+            geometry_hash.update(array.tobytes())
+        properties = dict((name, [None if value is None else str(value)
+            for value in values]) for name, values
+            in geometry.properties.items())
+        geometry_hash.update(json.dumps(properties,
+            sort_keys=True).encode('utf-8'))
+
+        selection = dict((name, sorted(value) if isinstance(value,
+            (set, frozenset, list, tuple)) else value) for name, value
+            in selection.items())
+        key_data = json.dumps([geometry_hash.hexdigest(), selection],
+                sort_keys=True)
+
+        return hashlib.sha1(key_data.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def derive_key(key, **params):
+        """Build the key of an entry derived from another (e.g. simplified).
+
+        Args:
+            key: str
+            params: keyword arguments of JSON serializable values
+        """
+
+        key_data = json.dumps([key, params], sort_keys=True)
+        return hashlib.sha1(key_data.encode('utf-8')).hexdigest()
+
+    def load(self, key):
+        """Load the geometry stored under `key`, or None if there isn't any.
+
+        Args:
+            key: str
+        """
+
+        entry_dir = os.path.join(self.cache_dir, key)
+        try:
+            arrays = [np.load(os.path.join(entry_dir, name + '.npy'),
+                mmap_mode='r') for name in self.array_names]
+            with open(os.path.join(entry_dir, 'properties.json')) as f:
+                properties = json.load(f)
+            os.utime(entry_dir, None)
+        except (IOError, OSError, ValueError):
+            return None
+
+        properties = dict((name, np.array(values, dtype=object))
+                for name, values in properties.items())
+        return GeometryStore(*arrays, properties=properties)
+
+    def store(self, key, geometry):
+        """Store geometry under `key`, evicting old entries if need be.
+
+        The entry is written to a temporary directory that's then
+        renamed into place, so a concurrent load never sees a partly
+        written entry.
+
+        Args:
+            key: str
+            geometry: GeometryStore
+        """
+
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp')
+        try:
+            for name in self.array_names:
+                np.save(os.path.join(tmp_dir, name + '.npy'),
+                        np.ascontiguousarray(getattr(geometry, name)))
+            properties = dict((name, values.tolist()) for name, values
+                    in geometry.properties.items())
+            with open(os.path.join(tmp_dir, 'properties.json'), 'w') as f:
+                json.dump(properties, f)
+            os.rename(tmp_dir, os.path.join(self.cache_dir, key))
+        except OSError:
+            # Another process stored the same entry first. 
+            pass
+        finally:
+            if os.path.isdir(tmp_dir):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._evict(keep=key)
+
+    def load_projected(self, key, projection_params):
+        """Load the projected coordinates stored for an entry.
+
+        Args:
+            key: str
+            projection_params: JSON serializable
+                Holds the parameters the coordinates were projected
+                with.
+
+        Returns:
+            2d numpy.ndarray (memory mapped), or None if there isn't
+            one stored.
+        """
+
+        return self._load_derived(key, 'projected', projection_params)
+
+    def store_projected(self, key, projection_params, projected_coords):
+        """Store the projected coordinates of an entry.
+
+        Args:
+            key: str
+            projection_params: JSON serializable
+            projected_coords: 2d numpy.ndarray
+        """
+
+        self._store_derived(key, 'projected', projection_params,
+                projected_coords)
+
+    def load_raster(self, key, raster_params):
+        """Load a raster (e.g. a rendered map) stored for an entry.
+
+        Args:
+            key: str
+            raster_params: JSON serializable
+                Holds the parameters the raster was rendered with.
+
+        Returns:
+            3d numpy.ndarray (memory mapped), or None if there isn't
+            one stored.
+        """
+
+        return self._load_derived(key, 'raster', raster_params)
+
+    def store_raster(self, key, raster_params, raster):
+        """Store a raster (e.g. a rendered map) for an entry.
+
+        Args:
+            key: str
+            raster_params: JSON serializable
+            raster: 3d numpy.ndarray
+        """
+
+        self._store_derived(key, 'raster', raster_params, raster)
+
+    def _load_derived(self, key, kind, params):
+        """Load an array derived from an entry, or None if there isn't one.
+
+        Args:
+            key: str
+            kind: str
+            params: JSON serializable
+        """
+
+        try:
+            return np.load(self._derived_path(key, kind, params),
+                    mmap_mode='r')
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _store_derived(self, key, kind, params, array):
+        """Store an array derived from an entry (if the entry exists).
+
+        Args:
+            key: str
+            kind: str
+            params: JSON serializable
+            array: numpy.ndarray
+        """
+
+        path = self._derived_path(key, kind, params)
+        if not os.path.isdir(os.path.dirname(path)):
+            return
+
+        tmp_path = '{0}.{1}.tmp.npy'.format(path, os.getpid())
+        np.save(tmp_path, np.ascontiguousarray(array))
+        os.rename(tmp_path, path)
+        self._evict(keep=key)
+
+    def _derived_path(self, key, kind, params):
+        """Build the path of an array derived from an entry.
+
+        Args:
+            key: str
+            kind: str
+                Holds the kind of array ('projected' or 'raster').
+            params: JSON serializable
+        """
+
+        params_hash = hashlib.sha1(json.dumps(params,
+            sort_keys=True).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key,
+                '{0}_{1}.npy'.format(kind, params_hash))
+
+    def _evict(self, keep=None):
+        """Remove the least recently used entries until under `max_bytes`.
+
+        Args:
+            keep (optional): str
+                Holds the key of an entry to never evict.
+        """
+
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, key)
+            if key.startswith('.') or not os.path.isdir(entry_dir):
+                continue
+            try:
+                n_bytes = sum(os.path.getsize(os.path.join(entry_dir, name))
+                        for name in os.listdir(entry_dir))
+                entries.append((os.path.getmtime(entry_dir), n_bytes, key))
+            except OSError:
+                continue
+
+        total_bytes = sum(n_bytes for _, n_bytes, _ in entries)
+        for _, n_bytes, key in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, key),
+                    ignore_errors=True)
+            total_bytes -= n_bytes
+
+class ShapefileIndex(object):
+    """Index from the attributes of shapefile features to their ids.
+
+    The index is built from the attributes of a shapefile alone, and
+    saved to a small JSON sidecar file, along with the sizes and
+    modification times of the shapefile (see `shapefile_stats`), so
+    that it's rebuilt whenever the shapefile changes.
+
+    Args:
+        state_ids: dict
+            Holds the ids of the features of each STATEFP.
+        county_ids: dict
+            Holds the ids of the features of each NAME, per STATEFP.
+        file_stats (optional): list
+    """
+
+    def __init__(self, state_ids, county_ids, file_stats=None):
+        self.state_ids = state_ids
+        self.county_ids = county_ids
+        self.file_stats = file_stats
+
+    @classmethod
+    def from_properties(cls, properties, file_stats=None):
+        """Build the index from the properties of each feature, in order.
+
+        Args:
+            properties: iterable of dicts
+            file_stats (optional): list
+        """
+
+        state_ids, county_ids = {}, {}
+        for feature_id, feature_properties in enumerate(properties):
+            state_fips = feature_properties.get('STATEFP')
+            name = feature_properties.get('NAME')
+            state_ids.setdefault(state_fips, []).append(feature_id)
+            county_ids.setdefault(state_fips, {}).setdefault(name, 
+                    []).append(feature_id)
+
+        return cls(state_ids, county_ids, file_stats)
+
+    @classmethod
+    def load(cls, index_path, file_stats=None):
+        """Load a saved index, or None if it's missing or out of date.
+
+        Args:
+            index_path: str
+            file_stats (optional): list
+                Holds the current stats of the shapefile. If given,
+                and they don't match the saved ones, None is returned.
+        """
+
+        try:
+            with open(index_path) as f:
+                index_data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if file_stats is not None and index_data['file_stats'] != file_stats:
+            return None
+
+        return cls(index_data['state_ids'], index_data['county_ids'],
+                index_data['file_stats'])
+
+    def save(self, index_path):
+        """Save the index to a JSON file.
+
+        Args:
+            index_path: str
+        """
+
+        tmp_path = '{0}.{1}.tmp'.format(index_path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump({'state_ids': self.state_ids, 'county_ids': 
+                self.county_ids, 'file_stats': self.file_stats}, f)
+        os.rename(tmp_path, index_path)
+
+    def select(self, state_fips=None, county_names=None,
+            exclude_state_fips=None):
+        """Find the ids of the features matching a selection.
+
+        Args:
+            state_fips (optional): iterable of strs
+                Holds the states to select. If None, all states are.
+            county_names (optional): iterable of strs
+                Holds the counties (within the selected states) to
+                select. If None, all counties are.
+            exclude_state_fips (optional): iterable of strs
+
+        Returns:
+            Sorted list of feature ids.
+        """
+
+        if state_fips is None:
+            state_fips = self.state_ids.keys()
+        exclude_state_fips = set(exclude_state_fips or [])
+        state_fips = [fips for fips in state_fips 
+                if fips not in exclude_state_fips]
+
+        feature_ids = []
+        for fips in state_fips:
+            if county_names is None:
+                feature_ids.extend(self.state_ids.get(fips, []))
+            else:
+                state_counties = self.county_ids.get(fips, {})
+                for name in county_names:
+                    feature_ids.extend(state_counties.get(name, []))
+
+        return sorted(feature_ids)
+
+def shapefile_stats(shapefile_path):
+    """Return the sizes and modification times of a shapefile's files.
+
+    Args:
+        shapefile_path: str
+    """
+
+    file_stats = []
+    base_path = os.path.splitext(shapefile_path)[0]
+    for path in (shapefile_path, base_path + '.dbf'):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            file_stats.append([stat.st_size, stat.st_mtime])
+
+    return file_stats
+
+def _simplify_mask(coords, ring_offsets, tolerance):
+    """Find the coordinates to keep when simplifying rings.
+
+    Rings are simplified with a vectorized version of Visvalingam's
+    algorithm: on each pass, every vertex whose triangle with its
+    (kept) neighbors is smaller than the threshold area, and smaller
+    than its neighbors' triangles, is removed, until none are left.
+
+    To keep the borders shared between adjacent features identical
+    after simplification, decisions are made per unique vertex rather
+    than per ring: a vertex is only removed if it's removable in every
+    ring it's part of. The junctions where borders meet (vertices
+    whose neighbors differ between the rings they're part of), the
+    first/last vertex of each ring, and the vertex of each ring
+    farthest from its first are never removed.
+
+    Args:
+        coords: 2d numpy.ndarray of floats
+        ring_offsets: 1d numpy.ndarray of ints
+        tolerance: float
+
+    Returns:
+        1d boolean numpy.ndarray
+    """
+
+    n_coords = coords.shape[0]
+    n_rings = ring_offsets.shape[0] - 1
+    keep = np.ones(n_coords, dtype=bool)
+    if n_coords == 0:
+        return keep
+
+    _, vertex_ids = np.unique(coords, axis=0, return_inverse=True)
+    vertex_ids = vertex_ids.ravel()
+    n_vertices = vertex_ids.max() + 1
+    ring_idx = np.repeat(np.arange(n_rings), np.diff(ring_offsets))
+
+    prev_ids, next_ids = np.roll(vertex_ids, 1), np.roll(vertex_ids, -1)
+    neighbors = np.column_stack([vertex_ids, np.minimum(prev_ids, next_ids),
+        np.maximum(prev_ids, next_ids)])
+    unique_neighbors = np.unique(neighbors, axis=0)
+    n_neighbor_pairs = np.bincount(unique_neighbors[:, 0],
+            minlength=n_vertices)
+
+    start_dists = ((coords - coords[ring_offsets[:-1]][ring_idx]) ** 2).sum(
+            axis=1)
+    farthest = np.lexsort((-start_dists, ring_idx))[ring_offsets[:-1]]
+
+    fixed_vertices = n_neighbor_pairs > 1
+    fixed_vertices[vertex_ids[ring_offsets[:-1]]] = True
+    fixed_vertices[vertex_ids[ring_offsets[1:] - 1]] = True
+    fixed_vertices[vertex_ids[farthest]] = True
+    fixed = fixed_vertices[vertex_ids]
+
+    # Repeated consecutive vertices add nothing, and would tie with 
+    # each other below. 
+    repeated = np.zeros(n_coords, dtype=bool)
+    repeated[1:] = (vertex_ids[1:] == vertex_ids[:-1]) & \
+            (ring_idx[1:] == ring_idx[:-1])
+    keep[repeated & ~fixed] = False
+
+    area_threshold = tolerance ** 2 / 2.
+    while True:
+        idx = np.flatnonzero(keep)
+        prev_idx = np.concatenate([idx[:1], idx[:-1]])
+        next_idx = np.concatenate([idx[1:], idx[-1:]])
+
+        prev_vec = coords[prev_idx] - coords[idx]
+        next_vec = coords[next_idx] - coords[idx]
+        areas = np.abs(prev_vec[:, 0] * next_vec[:, 1] -
+                prev_vec[:, 1] * next_vec[:, 0]) / 2.
+        areas[fixed[idx]] = np.inf
+
+        # Ties are broken by vertex id, so that the same vertices are 
+        # picked whichever direction a shared border is traversed in. 
+        kept_ids = vertex_ids[idx]
+        prev_areas = np.concatenate([[np.inf], areas[:-1]])
+        next_areas = np.concatenate([areas[1:], [np.inf]])
+        prev_kept_ids = np.concatenate([kept_ids[:1], kept_ids[:-1]])
+        next_kept_ids = np.concatenate([kept_ids[1:], kept_ids[-1:]])
+        removable = (areas < area_threshold) & \
+                ((areas < prev_areas) | ((areas == prev_areas) & 
+                    (kept_ids < prev_kept_ids))) & \
+                ((areas < next_areas) | ((areas == next_areas) & 
+                    (kept_ids < next_kept_ids)))
+        if not removable.any():
+            break
+
+        n_blocked = np.bincount(kept_ids[~removable], minlength=n_vertices)
+        remove = removable & (n_blocked[kept_ids] == 0)
+        if not remove.any():
+            break
+        keep[idx[remove]] = False
+
+    return keep
+
+def _lengths_to_offsets(lengths):
+    """Turn a sequence of lengths into offsets, starting at 0.
+
+    Args:
+        lengths: iterable of ints
+    """
+
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    return offsets
+
+def _ranges(starts, stops):
+    """Concatenate np.arange(start, stop) for each start/stop pair.
+
+    Args:
+        starts: 1d numpy.ndarray of ints
+        stops: 1d numpy.ndarray of ints
+    """
+
+    lengths = stops - starts
+    if lengths.sum() == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    offsets = _lengths_to_offsets(lengths)
+    range_starts = np.repeat(starts - offsets[:-1], lengths)
+
+    return range_starts + np.arange(offsets[-1])
@@ -0,0 +1,199 @@
+"""Opt-in instrumentation of the stages of the plotting functions.
+
+This module contains the `CallStats` class, which records the wall
+time, peak memory allocated (optionally, via tracemalloc), and counts
+(e.g. of features, vertices, or artists) of each stage of a call to
+one of the instrumented functions - `dist_plotting.plot_var_dist`,
+`dist_plotting.plot_binary_response`, and the build of a
+`geo_plotting.USMapBuilder`. Pass a `CallStats` in as their `stats`
+argument to read the numbers back afterwards, or register a callback
+with `add_callback` to be handed the `CallStats` of every instrumented
+call as it finishes (e.g. to ship them to a metrics pipeline). A call
+that raises still finishes, with the stages recorded up to the error.
+"""
+
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+_callbacks = []
+
+def add_callback(callback):
+    """Register a callback to call with the stats of every instrumented call.
+
+    Args:
+        callback: callable
+            Is called with the `CallStats` of each instrumented call,
+            once the call finishes.
+    """
+
+    if callback not in _callbacks:
+        _callbacks.append(callback)
+
+def remove_callback(callback):
+    """Unregister a callback registered with `add_callback`.
+
+    Args:
+        callback: callable
+    """
+
+    if callback in _callbacks:
+        _callbacks.remove(callback)
+
+class StageStats(object):
+    """Stats of a single stage of an instrumented call.
+
+    Args:
+        name: str
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = None
+        self.peak_bytes = None
+        self.counts = {}
+
+    def to_dict(self):
+        """Return the stats as a dict (e.g. to serialize them)."""
+
+        return {'name': self.name, 'seconds': self.seconds,
+                'peak_bytes': self.peak_bytes, 'counts': dict(self.counts)}
+
+    def __repr__(self):
+        return 'StageStats({0!r}, seconds={1!r}, peak_bytes={2!r}, ' \
+                'counts={3!r})'.format(self.name, self.seconds,
+                        self.peak_bytes, self.counts)
+
+class CallStats(object):
+    """Stats of each stage of an instrumented call.
+
+    Args:
+        name (optional): str
+            Holds the name of the call. If None, the instrumented
+            function fills it in.
+        trace_memory (optional): bool
+            Whether to record the peak memory allocated in each stage
+            (above what was allocated when it started). This traces
+            every allocation with tracemalloc, which slows the call
+            down considerably, so it's off by default. The peak of a
+            stage is only exact on Python 3.9+, where tracemalloc's
+            peak can be reset between stages.
+    """
+
+    def __init__(self, name=None, trace_memory=False):
+        self.name = name
+        self.trace_memory = trace_memory and tracemalloc is not None
+        self.stages = []
+        self._started_tracing = False
+
+    @property
+    def seconds(self):
+        """Total wall time of the recorded stages."""
+
+        return sum(stage.seconds or 0. for stage in self.stages)
+
+    @property
+    def peak_bytes(self):
+        """Largest peak memory allocated in any of the recorded stages."""
+
+        peaks = [stage.peak_bytes for stage in self.stages
+                if stage.peak_bytes is not None]
+        return max(peaks) if peaks else None
+
+    def __getitem__(self, stage_name):
+        """Return the (last) recorded stage with the given name."""
+
+        for stage in reversed(self.stages):
+            if stage.name == stage_name:
+                return stage
+        raise KeyError(stage_name)
+
+    def begin(self, name):
+        """Start recording a call, clearing any stages already recorded.
+
+        Args:
+            name: str
+                Used as the call's name if it doesn't already have one.
+        """
+
+        self.name = name if self.name is None else self.name
+        self.stages = []
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def finish(self):
+        """Finish recording a call, and hand the stats to the callbacks.
+
+        The instrumented functions call this in a `finally`, so that
+        tracing is stopped even if the call raises.
+        """
+
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        for callback in list(_callbacks):
+            callback(self)
+
+    def stage(self, name):
+        """Return a context manager that records a stage of the call.
+
+        Entering it returns the stage's `StageStats`, so that counts can
+        be added to it.
+
+        Args:
+            name: str
+        """
+
+        return _StageRecorder(self, name)
+
+    def to_dict(self):
+        """Return the stats as a dict (e.g. to serialize them)."""
+
+        return {'name': self.name, 'seconds': self.seconds,
+                'peak_bytes': self.peak_bytes,
+                'stages': [stage.to_dict() for stage in self.stages]}
+
+    def __repr__(self):
+        return 'CallStats({0!r}, seconds={1!r}, stages={2!r})'.format(
+                self.name, self.seconds, [stage.name for stage in self.stages])
+
+class _StageRecorder(object):
+    """Context manager recording a stage into a CallStats.
+
+    Args:
+        call_stats: CallStats
+        name: str
+    """
+
+    def __init__(self, call_stats, name):
+        self.call_stats = call_stats
+        self.stage_stats = StageStats(name)
+
+    def __enter__(self):
+        if self.call_stats.trace_memory:
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            self._start_bytes = tracemalloc.get_traced_memory()[0]
+        self._start_time = time.time()
+        return self.stage_stats
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stage_stats.seconds = time.time() - self._start_time
+        if self.call_stats.trace_memory:
+            self.stage_stats.peak_bytes = max(
+                    tracemalloc.get_traced_memory()[1] - self._start_bytes, 0)
+        self.call_stats.stages.append(self.stage_stats)
+
+def count_artists(axes):
+    """Count the artists drawn on a set of axes.
+
+    Args:
+        axes: iterable of matplotlib.pyplot.Axes objects
+    """
+
+    return sum(len(ax.lines) + len(ax.collections) + len(ax.patches) +
+            len(ax.texts) + len(ax.images) for ax in axes)
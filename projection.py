@@ -0,0 +1,127 @@
+"""A lightweight map projection, for building maps without Basemap.
+
+This module contains the `AlbersProjection` class, which implements
+the (spherical or ellipsoidal) Albers equal-area conic projection,
+vectorized in numpy, following Snyder's "Map Projections - A Working Manual"
+(USGS Professional Paper 1395, pp. 101-102). It's a drop-in stand in
+for the parts of a `Basemap(projection='aea', ...)` that
+`geo_plotting.USMapBuilder` uses: it's called on lng/lat arrays to
+project them (into the same x/y space as Basemap, with the lower left
+corner of the map at 0, 0), and it sets up the axes to plot on.
+"""
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+class AlbersProjection(object):
+    """Albers equal-area conic projection of a rectangular map.
+
+    Args:
+        llcrnrlon: float
+        llcrnrlat: float
+        urcrnrlon: float
+        urcrnrlat: float
+            Hold the lng/lat of the lower left and upper right corners
+            of the map.
+        lat_1: float
+        lat_2: float
+            Hold the standard parallels.
+        lon_0: float
+        lat_0: float
+            Hold the origin of the projection.
+        ax (optional): matplotlib.pyplot.Axes object
+            Holds an axis to plot on. If None, the current axis is.
+        rsphere (optional): float or tuple of floats
+            Holds the radius of the sphere, or the semi-major and
+            semi-minor axes of the ellipsoid, to project from. The
+            default is the sphere Basemap uses by default.
+    """
+
+    def __init__(self, llcrnrlon, llcrnrlat, urcrnrlon, urcrnrlat, lat_1,
+            lat_2, lon_0, lat_0, ax=None, rsphere=6370997.):
+        self.ax = ax
+        self.lon_0 = lon_0
+        if np.ndim(rsphere) == 0:
+            rsphere = (rsphere, rsphere)
+        self.a = float(rsphere[0])
+        self.e = np.sqrt(1. - (float(rsphere[1]) / self.a) ** 2)
+
+        phi_1, phi_2, phi_0 = np.radians([lat_1, lat_2, lat_0])
+        m_1, m_2 = self._calc_m(phi_1), self._calc_m(phi_2)
+        q_1, q_2 = self._calc_q(phi_1), self._calc_q(phi_2)
+        if np.isclose(phi_1, phi_2):
+            self.n = np.sin(phi_1)
+        else:
+            self.n = (m_1 ** 2 - m_2 ** 2) / (q_2 - q_1)
+        self.c = m_1 ** 2 + self.n * q_1
+        self.rho_0 = self._calc_rho(self._calc_q(phi_0))
+
+        self.x_offset, self.y_offset = 0., 0.
+        self.x_offset, self.y_offset = self(llcrnrlon, llcrnrlat)
+        self.llcrnrx, self.llcrnry = 0., 0.
+        self.urcrnrx, self.urcrnry = self(urcrnrlon, urcrnrlat)
+
+    def __call__(self, lngs, lats):
+        """Project lng/lats onto the map.
+
+        Args:
+            lngs: float or numpy.ndarray of floats
+            lats: float or numpy.ndarray of floats
+
+        Returns:
+            x, y: floats or numpy.ndarrays of floats
+        """
+
+        lngs = np.asarray(lngs, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+
+        rho = self._calc_rho(self._calc_q(np.radians(lats)))
+        theta = self.n * np.radians(lngs - self.lon_0)
+        x = rho * np.sin(theta) - self.x_offset
+        y = self.rho_0 - rho * np.cos(theta) - self.y_offset
+
+        if x.ndim == 0:
+            return float(x), float(y)
+        return x, y
+
+    def _calc_m(self, phi):
+        """Calculate Snyder's m (eq. 14-15) at latitudes, in radians."""
+
+        sin_phi = np.sin(phi)
+        return np.cos(phi) / np.sqrt(1. - (self.e * sin_phi) ** 2)
+
+    def _calc_q(self, phi):
+        """Calculate Snyder's q (eq. 3-12) at latitudes, in radians."""
+
+        if self.e == 0:
+            return 2. * np.sin(phi)
+
+        e_sin_phi = self.e * np.sin(phi)
+        return (1. - self.e ** 2) * (np.sin(phi) / (1. - e_sin_phi ** 2) -
+                np.log((1. - e_sin_phi) / (1. + e_sin_phi)) / (2. * self.e))
+
+    def _calc_rho(self, q):
+        """Calculate Snyder's rho (eq. 14-12a) from q."""
+
+        return self.a * np.sqrt(self.c - self.n * q) / self.n
+
+    def _check_ax(self):
+        """Return the axis to plot on (self.ax, or the current axis)."""
+
+        return plt.gca() if self.ax is None else self.ax
+
+    def set_axes_limits(self, ax=None):
+        """Set the axis limits to the map, and fix its aspect ratio.
+
+        Args:
+            ax (optional): matplotlib.pyplot.Axes object
+        """
+
+        ax = self._check_ax() if ax is None else ax
+
+        ax.set_autoscale_on(False)
+        ax.set_xlim((self.llcrnrx, self.urcrnrx))
+        ax.set_ylim((self.llcrnry, self.urcrnry))
+        ax.set_aspect('equal', anchor='C')
+        ax.set_xticks([])
+        ax.set_yticks([])
@@ -0,0 +1,259 @@
+"""A tool for profiling every column of a DataFrame at once.
+
+This module contains `profile_report`, which plots the distribution
+of every column of a DataFrame (via `dist_plotting.plot_var_dist`)
+to an image file, and writes an index page that links them together
+with a table of summary statistics.
+
+Columns are labeled categorical or continuous automatically. The
+statistics in the index of all of the continuous columns are calculated
+together, in one vectorized pass over the frame. The plots are rendered
+by a pool of processes on a non-interactive backend - each is handed
+the values of a column, reduces them to a `DistributionSummary`
+(sketch and histogram), and plots it. A manifest of column hashes
+is kept in the output directory (along with the options they were
+rendered with), so that re-running the report can skip the columns
+whose data and options haven't changed.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+try:
+    from html import escape
+except ImportError:
+    from cgi import escape
+
+from .dist_plotting import plot_var_dist
+from .dist_summary import DistributionSummary
+
+MANIFEST_FILENAME = 'manifest.json'
+INDEX_FILENAME = 'index.html'
+
+def profile_report(df, output_dir, n_jobs=1, categorical_threshold=20,
+        skip_unchanged=True, figsize=(16, 4), image_format='png', bins=20):
+    """Plot the distribution of every column of a DataFrame to files.
+
+    Args:
+        df: Pandas DataFrame
+        output_dir: str
+            Holds the directory to write the images and index page to.
+            It's created if it doesn't exist.
+        n_jobs (optional): int
+            Number of processes to render with, where -1 uses all of
+            the available cores.
+        categorical_threshold (optional): int
+            Numeric columns with at most this many unique values are
+            treated as categorical. Non-numeric (and boolean) columns
+            always are.
+        skip_unchanged (optional): bool
+            Whether to skip re-rendering columns whose data hashes to
+            the same value as on the last run into `output_dir`, and
+            that are rendered with the same options.
+        figsize (optional): tuple of ints
+        image_format (optional): str
+        bins (optional): int
+            Number of bins to use for the histograms of continuous
+            columns.
+
+    Returns:
+        Pandas DataFrame of summary statistics, indexed by column.
+    """
+
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    categorical_cols = _find_categorical_cols(df, categorical_threshold)
+    stats = _calc_column_stats(df, categorical_cols)
+
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    old_manifest = {}
+    if skip_unchanged and os.path.exists(manifest_path):
+        with open(manifest_path) as manifest_file:
+            old_manifest = json.load(manifest_file)
+
+    # The rendered images depend on these, as well as on the data.
+    render_options = {'figsize': list(figsize), 'bins': bins}
+    manifest, render_args = {}, []
+    for col in df.columns:
+        col_key = str(col)
+        col_hash = _hash_column(df[col])
+        image_filename = '{0}.{1}'.format(_safe_filename(col_key),
+                image_format)
+        image_path = os.path.join(output_dir, image_filename)
+        categorical = col in categorical_cols
+        manifest[col_key] = {'hash': col_hash, 'image': image_filename,
+                'categorical': categorical, 'options': render_options}
+
+        if old_manifest.get(col_key) == manifest[col_key] and \
+                os.path.exists(image_path):
+            continue
+
+        render_args.append((col_key, df[col].values, categorical,
+            image_path, figsize, bins))
+
+    n_jobs = multiprocessing.cpu_count() if n_jobs == -1 else n_jobs
+    if n_jobs > 1 and len(render_args) > 1:
+        pool = multiprocessing.Pool(min(n_jobs, len(render_args)),
+                initializer=_init_worker)
+        try:
+            pool.map(_render_column, render_args)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        backend = matplotlib.get_backend()
+        _init_worker()
+        try:
+            for args in render_args:
+                _render_column(args)
+        finally:
+            plt.switch_backend(backend)
+
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    _write_index(output_dir, stats, manifest)
+
+    return stats
+
+def _find_categorical_cols(df, categorical_threshold):
+    """Find the columns of the DataFrame to treat as categorical.
+
+    Args:
+        df: Pandas DataFrame
+        categorical_threshold: int
+    """
+
+    numeric_cols = [col for col in df.columns if
+            pd.api.types.is_numeric_dtype(df[col]) and
+            not pd.api.types.is_bool_dtype(df[col])]
+    n_unique = df[numeric_cols].nunique()
+
+    return set(col for col in df.columns if col not in numeric_cols or
+            n_unique[col] <= categorical_threshold)
+
+def _calc_column_stats(df, categorical_cols):
+    """Calculate the summary statistics of every column.
+
+    The continuous columns are stacked into a single 2d float array,
+    and all of their statistics are calculated along its first axis
+    at once.
+
+    Args:
+        df: Pandas DataFrame
+        categorical_cols: set
+
+    Returns:
+        Pandas DataFrame of statistics, indexed by column.
+    """
+
+    continuous_cols = [col for col in df.columns
+            if col not in categorical_cols]
+    stats_frames = []
+
+    if continuous_cols:
+        values = df[continuous_cols].values.astype(np.float64)
+        finite = np.isfinite(values)
+        values[~finite] = np.nan
+        quartiles = np.nanpercentile(values, [25, 50, 75], axis=0)
+        stats_frames.append(pd.DataFrame({'type': 'continuous',
+            'count': finite.sum(axis=0), 'missing': (~finite).sum(axis=0),
+            'mean': np.nanmean(values, axis=0),
+            'std': np.nanstd(values, axis=0),
+            'min': np.nanmin(values, axis=0), '25%': quartiles[0],
+            '50%': quartiles[1], '75%': quartiles[2],
+            'max': np.nanmax(values, axis=0)}, index=continuous_cols))
+
+    categorical_cols = [col for col in df.columns if col in categorical_cols]
+    if categorical_cols:
+        missing = df[categorical_cols].isnull().sum()
+        stats_frames.append(pd.DataFrame({'type': 'categorical',
+            'count': len(df) - missing, 'missing': missing,
+            'unique': df[categorical_cols].nunique()},
+            index=categorical_cols))
+
+    stats = pd.concat(stats_frames, sort=False) if stats_frames \
+            else pd.DataFrame()
+    return stats.reindex(df.columns)
+
+def _hash_column(col_data):
+    """Hash the data of a column.
+
+    Args:
+        col_data: Pandas Series
+    """
+
+    hashed = pd.util.hash_pandas_object(col_data, index=False).values
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+def _safe_filename(col_key):
+    """Turn a column name into a unique, filesystem safe file name.
+
+    Args:
+        col_key: str
+    """
+
+    name_hash = hashlib.sha1(col_key.encode('utf-8')).hexdigest()[:8]
+    return '{0}_{1}'.format(re.sub(r'[^A-Za-z0-9_-]', '_', col_key)[:64],
+            name_hash)
+
+def _init_worker():
+    """Switch a rendering process to a non-interactive backend."""
+
+    plt.switch_backend('Agg')
+
+def _render_column(args):
+    """Summarize one column, and render its distribution plot to a file.
+
+    Args:
+        args: tuple
+            Holds the column name, its values, whether it's categorical,
+            the path to write the image to, the figure size, and the
+            number of histogram bins.
+    """
+
+    col_key, col_values, categorical, image_path, figsize, bins = args
+    summary = DistributionSummary.from_data(col_values, categorical)
+
+    if summary.categorical:
+        fig, ax = plt.subplots(1, 1, figsize=figsize)
+    else:
+        fig, ax = plt.subplots(1, 4, figsize=figsize)
+    plot_var_dist(summary, summary.categorical, show=False, ax=ax,
+            bins=bins)
+    fig.suptitle(col_key)
+    fig.savefig(image_path)
+    plt.close(fig)
+
+def _write_index(output_dir, stats, manifest):
+    """Write an HTML index page of the statistics and plots.
+
+    Column names are HTML escaped, so that any name can be written.
+
+    Args:
+        output_dir: str
+        stats: Pandas DataFrame
+        manifest: dict
+    """
+
+    sections = []
+    for col, col_stats in stats.iterrows():
+        col_key = str(col)
+        sections.append('<h2 id="{0}">{0}</h2>\n{1}\n<img src="{2}">'.format(
+            escape(col_key, quote=True),
+            col_stats.dropna().to_frame().T.to_html(escape=True),
+            escape(manifest[col_key]['image'], quote=True)))
+
+    html = ('<html>\n<head><title>Profile report</title></head>\n<body>\n'
+            '<h1>Profile report</h1>\n{0}\n{1}\n</body>\n</html>\n').format(
+                    stats.to_html(escape=True), '\n'.join(sections))
+    with open(os.path.join(output_dir, INDEX_FILENAME), 'w') as index_file:
+        index_file.write(html)
@@ -8,5 +8,16 @@ setup(name='dsfuncs',
       description='Python programs/classes/functions for data-sciencers',
       author='Sean Sall',
       url='https://github.com/sallamander/dsfuncs.git',
-      packages=[],
+      # The repository is itself the package.
+      packages=['dsfuncs'],
+      package_dir={'dsfuncs': '.'},
+      install_requires=['numpy'],
+      extras_require={
+          'plotting': ['matplotlib', 'seaborn', 'pandas'],
+          'geo': ['matplotlib', 'fiona'],
+          'basemap': ['basemap'],
+          'parquet': ['pandas', 'pyarrow'],
+          'all': ['matplotlib', 'seaborn', 'pandas', 'fiona', 'basemap',
+              'pyarrow'],
+      },
 )
@@ -0,0 +1,302 @@
+"""A tool for assigning points to the features that they fall in.
+
+This module contains the `SpatialIndex` class, and the `spatial_join`
+function built on it, which find the feature of a `GeometryStore`
+(e.g. the states or counties parsed by a `geo_plotting.USMapBuilder`)
+that each of a batch of lng/lat points falls in.
+
+Rather than testing every point against every feature, the bounding
+boxes of the features are binned into a regular grid, so that each
+point only needs to be tested against the features whose boxes
+overlap its cell. Those tests are vectorized over all of the
+candidate points of a feature at once.
+"""
+
+import multiprocessing
+
+import numpy as np
+
+from .geometry import _lengths_to_offsets, _ranges
+
+class SpatialIndex(object):
+    """Grid index over the bounding boxes of the features of a GeometryStore.
+
+    Args:
+        geometry: geometry.GeometryStore
+        cells_per_feature (optional): float
+            Holds the number of grid cells to build per feature. More
+            cells means fewer candidate features per point, but more
+            memory.
+        max_block_size (optional): int
+            Holds the maximum number of point/edge pairs to test at a
+            time, which bounds the memory the tests use.
+    """
+
+    def __init__(self, geometry, cells_per_feature=4, max_block_size=2 ** 22):
+        self.geometry = geometry
+        self.max_block_size = max_block_size
+        self.feature_bounds = geometry.feature_bounds()
+
+        n_features = geometry.n_features
+        if n_features:
+            self.lng_min, self.lat_min = self.feature_bounds[:, :2].min(axis=0)
+            self.lng_max, self.lat_max = self.feature_bounds[:, 2:].max(axis=0)
+        else:
+            self.lng_min = self.lat_min = 0.
+            self.lng_max = self.lat_max = 1.
+        lng_span = max(self.lng_max - self.lng_min, 1e-12)
+        lat_span = max(self.lat_max - self.lat_min, 1e-12)
+
+        n_cells = max(n_features * cells_per_feature, 1)
+        self.n_lng_cells = max(int(np.sqrt(n_cells * lng_span / lat_span)), 1)
+        self.n_lat_cells = max(int(n_cells / self.n_lng_cells), 1)
+        self.cell_width = lng_span / self.n_lng_cells
+        self.cell_height = lat_span / self.n_lat_cells
+
+        self._build_cells()
+        self._build_edges()
+
+    def _build_cells(self):
+        """Bin the feature bounding boxes into the cells they overlap.
+
+        The result is stored CSR style: the features overlapping cell
+        i are `cell_features[cell_offsets[i]:cell_offsets[i + 1]]`.
+        """
+
+        lng_lo, lat_lo = self._calc_cells(self.feature_bounds[:, 0],
+                self.feature_bounds[:, 1])
+        lng_hi, lat_hi = self._calc_cells(self.feature_bounds[:, 2],
+                self.feature_bounds[:, 3])
+        n_lng = lng_hi - lng_lo + 1
+        n_lat = lat_hi - lat_lo + 1
+
+        # Expand each feature into its (lng cell, lat cell) pairs.
+        feature_idx = np.repeat(np.arange(self.geometry.n_features),
+                n_lng * n_lat)
+        within = _ranges(np.zeros_like(n_lng), n_lng * n_lat)
+        cell_lng = lng_lo[feature_idx] + within % n_lng[feature_idx]
+        cell_lat = lat_lo[feature_idx] + within // n_lng[feature_idx]
+        cell_idx = cell_lat * self.n_lng_cells + cell_lng
+
+        order = np.argsort(cell_idx, kind='mergesort')
+        self.cell_features = feature_idx[order]
+        self.cell_offsets = _lengths_to_offsets(np.bincount(cell_idx,
+            minlength=self.n_lng_cells * self.n_lat_cells))
+
+    def _build_edges(self):
+        """Gather the edges of every ring, grouped by feature.
+
+        The edges of feature k are rows `edge_offsets[k]:edge_offsets[k
+        + 1]` of `edges`, which holds an (x1, y1, x2, y2) row per edge.
+        """
+
+        coords = self.geometry.coords
+        ring_offsets = self.geometry.ring_offsets
+
+        # An edge joins each coordinate to the next, except across rings.
+        is_edge = np.ones(max(coords.shape[0] - 1, 0), dtype=bool)
+        ring_ends = ring_offsets[1:-1] - 1
+        is_edge[ring_ends[ring_ends < is_edge.shape[0]]] = False
+        edge_starts = np.flatnonzero(is_edge)
+        self.edges = np.column_stack([coords[edge_starts],
+            coords[edge_starts + 1]])
+
+        ring_feature_idx = self.geometry.ring_feature_idx()
+        coord_ring_idx = np.repeat(np.arange(self.geometry.n_rings),
+                np.diff(ring_offsets))
+        edge_feature_idx = ring_feature_idx[coord_ring_idx[edge_starts]]
+        self.edge_offsets = _lengths_to_offsets(np.bincount(
+            edge_feature_idx, minlength=self.geometry.n_features))
+
+    def _calc_cells(self, lngs, lats):
+        """Calculate the (clipped) grid cell of each lng/lat.
+
+        Args:
+            lngs: 1d numpy.ndarray of floats
+            lats: 1d numpy.ndarray of floats
+        """
+
+        lng_cells = np.floor((lngs - self.lng_min) / self.cell_width)
+        lat_cells = np.floor((lats - self.lat_min) / self.cell_height)
+        lng_cells = np.clip(lng_cells, 0, self.n_lng_cells - 1).astype(
+                np.int64)
+        lat_cells = np.clip(lat_cells, 0, self.n_lat_cells - 1).astype(
+                np.int64)
+
+        return lng_cells, lat_cells
+
+    def query(self, lngs, lats):
+        """Find the feature that each point falls in.
+
+        A point on a border between features may be assigned to
+        either. Points with a missing lng/lat fall in none.
+
+        Args:
+            lngs: 1d numpy.ndarray of floats
+            lats: 1d numpy.ndarray of floats
+
+        Returns:
+            1d numpy.ndarray holding the index of the feature of each
+            point, or -1 if it isn't in any.
+        """
+
+        lngs = np.asarray(lngs, dtype=np.float64).ravel()
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        result = np.full(lngs.shape[0], -1, dtype=np.int64)
+
+        in_grid = (lngs >= self.lng_min) & (lngs <= self.lng_max) & \
+                (lats >= self.lat_min) & (lats <= self.lat_max)
+        point_idx = np.flatnonzero(in_grid)
+        lng_cells, lat_cells = self._calc_cells(lngs[point_idx],
+                lats[point_idx])
+        cell_idx = lat_cells * self.n_lng_cells + lng_cells
+
+        # Expand each point into its candidate features, and keep only
+        # those whose bounding box holds it.
+        starts = self.cell_offsets[cell_idx]
+        n_candidates = self.cell_offsets[cell_idx + 1] - starts
+        pair_points = np.repeat(point_idx, n_candidates)
+        pair_features = self.cell_features[_ranges(starts,
+            starts + n_candidates)]
+        pair_bounds = self.feature_bounds[pair_features]
+        in_bounds = (lngs[pair_points] >= pair_bounds[:, 0]) & \
+                (lats[pair_points] >= pair_bounds[:, 1]) & \
+                (lngs[pair_points] <= pair_bounds[:, 2]) & \
+                (lats[pair_points] <= pair_bounds[:, 3])
+        pair_points = pair_points[in_bounds]
+        pair_features = pair_features[in_bounds]
+
+        # Test the candidate points of each feature together, in order
+        # of feature, so that the first feature a point falls in wins.
+        order = np.lexsort((pair_points, pair_features))
+        pair_points = pair_points[order]
+        pair_features = pair_features[order]
+        group_starts = np.flatnonzero(np.diff(pair_features)) + 1
+        group_offsets = np.concatenate([[0], group_starts,
+            [pair_features.shape[0]]])
+
+        for start, stop in zip(group_offsets[:-1], group_offsets[1:]):
+            if start == stop:
+                continue
+            candidates = pair_points[start:stop]
+            candidates = candidates[result[candidates] == -1]
+            if candidates.shape[0] == 0:
+                continue
+            feature = pair_features[start]
+            edges = self.edges[self.edge_offsets[feature]:
+                    self.edge_offsets[feature + 1]]
+            inside = self._points_in_edges(lngs[candidates],
+                    lats[candidates], edges)
+            result[candidates[inside]] = feature
+
+        return result
+
+    def _points_in_edges(self, lngs, lats, edges):
+        """Test which points fall inside the polygon(s) formed by edges.
+
+        Uses the even-odd rule (so holes, and the parts of a
+        MultiPolygon, need no special treatment): a point is inside
+        if a ray cast from it crosses an odd number of edges. The
+        point/edge pairs are tested in blocks of at most
+        `max_block_size`.
+
+        Args:
+            lngs: 1d numpy.ndarray of floats
+            lats: 1d numpy.ndarray of floats
+            edges: 2d numpy.ndarray of floats
+
+        Returns:
+            1d boolean numpy.ndarray
+        """
+
+        crossings = np.zeros(lngs.shape[0], dtype=np.int64)
+        if edges.shape[0] == 0:
+            return crossings.astype(bool)
+
+        block_size = max(self.max_block_size // edges.shape[0], 1)
+        x1, y1, x2, y2 = edges.T
+        for block_start in range(0, lngs.shape[0], block_size):
+            block = slice(block_start, block_start + block_size)
+            block_lngs = lngs[block, np.newaxis]
+            block_lats = lats[block, np.newaxis]
+
+            straddles = (y1 > block_lats) != (y2 > block_lats)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                crossing_lngs = x1 + (block_lats - y1) * (x2 - x1) / (y2 - y1)
+            crossings[block] = (straddles &
+                    (block_lngs < crossing_lngs)).sum(axis=1)
+
+        return crossings % 2 == 1
+
+def spatial_join(geometry, lngs, lats, n_jobs=1, batch_size=10 ** 6,
+        index=None):
+    """Find the feature of a GeometryStore that each point falls in.
+
+    Args:
+        geometry: geometry.GeometryStore
+        lngs: 1d numpy.ndarray of floats
+        lats: 1d numpy.ndarray of floats
+        n_jobs (optional): int
+            Number of processes to split the points between, where -1
+            uses all of the available cores.
+        batch_size (optional): int
+            Holds the number of points to query at a time (per process).
+        index (optional): SpatialIndex
+            Holds an index built over `geometry`, to reuse it.
+
+    Returns:
+        1d numpy.ndarray holding the index of the feature of each
+        point, or -1 if it isn't in any.
+    """
+
+    index = SpatialIndex(geometry) if index is None else index
+    lngs = np.asarray(lngs, dtype=np.float64).ravel()
+    lats = np.asarray(lats, dtype=np.float64).ravel()
+    batches = [(start, start + batch_size) for start
+            in range(0, lngs.shape[0], batch_size)]
+
+    n_jobs = multiprocessing.cpu_count() if n_jobs == -1 else n_jobs
+    if n_jobs == 1 or len(batches) <= 1:
+        return np.concatenate([index.query(lngs[start:stop],
+            lats[start:stop]) for start, stop in batches] or
+            [np.zeros(0, dtype=np.int64)])
+
+    pool = multiprocessing.Pool(min(n_jobs, len(batches)),
+            initializer=_init_worker, initargs=(index, lngs, lats))
+    try:
+        results = pool.map(_query_batch, batches)
+    finally:
+        pool.close()
+        pool.join()
+
+    return np.concatenate(results)
+
+# Holds the index and points of a worker process (see `_init_worker`).
+_worker_state = {}
+
+def _init_worker(index, lngs, lats):
+    """Store the index and points in a worker process.
+
+    They're passed once per process (rather than once per batch).
+
+    Args:
+        index: SpatialIndex
+        lngs: 1d numpy.ndarray of floats
+        lats: 1d numpy.ndarray of floats
+    """
+
+    _worker_state['index'] = index
+    _worker_state['lngs'] = lngs
+    _worker_state['lats'] = lats
+
+def _query_batch(batch):
+    """Query a batch of the worker's points.
+
+    Args:
+        batch: tuple of ints
+            Holds the start/stop of the batch.
+    """
+
+    start, stop = batch
+    return _worker_state['index'].query(_worker_state['lngs'][start:stop],
+            _worker_state['lats'][start:stop])
@@ -0,0 +1,56 @@
+"""Fixtures shared by the tests.
+
+The repository is itself the package, so it's imported from its parent
+directory under its directory name (as in `benchmarks/synthetic.py`),
+and made importable as `dsfuncs` whatever that name is.
+"""
+
+import importlib
+import os
+import sys
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import numpy as np
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.dirname(PACKAGE_DIR) not in sys.path:
+    sys.path.insert(0, os.path.dirname(PACKAGE_DIR))
+sys.modules.setdefault('dsfuncs', importlib.import_module(
+    os.path.basename(PACKAGE_DIR)))
+
+@pytest.fixture
+def shapefile_path(tmpdir):
+    """Write a small shapefile of two states of four square counties each.
+
+    Each county edge has a few slightly wiggled vertices, so that
+    simplification has something to remove.
+    """
+
+    fiona = pytest.importorskip('fiona')
+
+    steps = np.linspace(0, 1, 10, endpoint=False)
+    wiggle = 0.01 * np.sin(np.pi * steps * 3)
+    schema = {'geometry': 'Polygon', 'properties': {'STATEFP': 'str',
+        'NAME': 'str', 'GEOID': 'str'}}
+    path = str(tmpdir.join('states.shp'))
+    with fiona.open(path, 'w', driver='ESRI Shapefile', schema=schema) \
+            as dst:
+        for state_idx, state_fips in enumerate(('01', '04')):
+            for county_idx in range(4):
+                lng = -100. + 3 * state_idx + county_idx % 2
+                lat = 35. + county_idx // 2
+                ring = np.vstack([
+                    np.column_stack([lng + steps, lat + wiggle]),
+                    np.column_stack([lng + 1 + wiggle, lat + steps]),
+                    np.column_stack([lng + 1 - steps, lat + 1 + wiggle]),
+                    np.column_stack([lng + wiggle, lat + 1 - steps]),
+                    [[lng, lat]]])
+                dst.write({'geometry': {'type': 'Polygon',
+                    'coordinates': [[tuple(vertex) for vertex in ring]]},
+                    'properties': {'STATEFP': state_fips,
+                        'NAME': 'County {0}'.format(county_idx),
+                        'GEOID': state_fips + '00{0}'.format(county_idx)}})
+
+    return path
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('matplotlib')
+pytest.importorskip('seaborn')
+
+import matplotlib.pyplot as plt
+
+from dsfuncs import dist_plotting, dist_summary
+
+def test_plot_var_dist_of_empty_summary():
+    summary = dist_summary.DistributionSummary.from_data(
+            np.full(10, np.nan))
+    fig, ax = plt.subplots(1, 4)
+
+    dist_plotting.plot_var_dist(summary, False, show=False, ax=ax)
+
+    assert [axis.get_title() for axis in ax] == ['With Outliers'] * 2 + \
+            ['Without outliers'] * 2
+    assert all(not axis.lines and not axis.collections for axis in ax)
+    plt.close(fig)
+
+def test_plot_var_dist_of_small_array():
+    data = np.random.RandomState(0).standard_t(3, size=1000)
+    fig, ax = plt.subplots(1, 4)
+
+    dist_plotting.plot_var_dist(data, False, show=False, ax=ax)
+
+    assert all(axis.get_title() for axis in ax)
+    plt.close(fig)
@@ -0,0 +1,12 @@
+import numpy as np
+
+from dsfuncs import dist_summary
+
+def test_histogram_of_empty_summary():
+    summary = dist_summary.DistributionSummary.from_data(
+            np.array([np.nan, np.inf]))
+
+    counts, edges = summary.histogram()
+
+    assert summary.n == 0 and summary.n_missing == 2
+    assert counts.shape == (0, ) and edges.shape == (0, )
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+pytest.importorskip('fiona')
+pytest.importorskip('matplotlib')
+
+from dsfuncs import geo_plotting, geometry
+
+def test_plot_small_multiples_cache_dir_and_simplify(shapefile_path, tmpdir):
+    cache_dir = str(tmpdir.join('cache'))
+    output_dir = str(tmpdir.join('maps'))
+
+    # The second run loads the simplified and projected boundaries
+    # from the cache that the first one stored them in.
+    for _ in range(2):
+        image_paths = geo_plotting.plot_small_multiples(shapefile_path,
+                output_dir=output_dir, cache_dir=cache_dir,
+                simplify_tolerance=0.05, projection_backend='numpy')
+
+    assert sorted(image_paths) == ['Alabama', 'Arizona']
+    assert all(os.path.exists(path) for path in image_paths.values())
+    assert os.listdir(cache_dir)
+
+def test_geometry_key_changes_with_selection(shapefile_path, tmpdir):
+    import fiona
+
+    with fiona.open(shapefile_path) as src:
+        source_geometry = geometry.GeometryStore.from_features(src)
+
+    builders = [geo_plotting.USMapBuilder(None, geo_level='State',
+        state_names=[state_name], geometry=source_geometry,
+        cache_dir=str(tmpdir.join('cache')), projection_backend='numpy')
+        for state_name in ('Alabama', 'Arizona', 'Alabama')]
+
+    assert builders[0]._cache_key == builders[2]._cache_key
+    assert builders[0]._cache_key != builders[1]._cache_key
+    assert builders[0]._cache_key == \
+            geometry.GeometryCache.make_geometry_key(
+                builders[0].geometry, geo_level='State')
@@ -0,0 +1,23 @@
+import pytest
+
+from dsfuncs import instrumentation
+
+tracemalloc = pytest.importorskip('tracemalloc')
+
+def test_failing_call_stops_tracing(tmpdir):
+    pytest.importorskip('fiona')
+    from dsfuncs import geo_plotting
+
+    finished = []
+    instrumentation.add_callback(finished.append)
+    stats = instrumentation.CallStats(trace_memory=True)
+    try:
+        with pytest.raises(Exception):
+            geo_plotting.USMapBuilder(str(tmpdir.join('missing.shp')),
+                    projection_backend='numpy', stats=stats)
+    finally:
+        instrumentation.remove_callback(finished.append)
+
+    assert not tracemalloc.is_tracing()
+    assert finished == [stats]
+    assert [stage.name for stage in stats.stages] == ['open']
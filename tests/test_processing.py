@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from dsfuncs import processing
+
+def make_data_with_nans(n_obs=100000, n_nans=100, seed=0):
+    random_state = np.random.RandomState(seed)
+    data = random_state.standard_t(3, size=n_obs)
+    data[random_state.choice(n_obs, n_nans, replace=False)] = np.nan
+    return data
+
+@pytest.mark.parametrize('method', ['std', 'iqr', 'mad'])
+def test_remove_outliers_chunked_with_nans(method):
+    data = make_data_with_nans()
+
+    filtered = np.concatenate(list(processing.remove_outliers_chunked(data,
+        chunk_size=10000, method=method, sketch_size=2000)))
+    expected = processing.remove_outliers(data, method=method)
+
+    assert not np.isnan(filtered).any()
+    if method == 'std':
+        np.testing.assert_array_equal(filtered, expected)
+    else:
+        # The chunked quantiles are sketched, so the bounds are close
+        # to (rather than exactly) those of remove_outliers.
+        assert abs(filtered.shape[0] - expected.shape[0]) < \
+                0.005 * data.shape[0]
+
+@pytest.mark.parametrize('method', ['std', 'iqr', 'mad'])
+def test_remove_outliers_grouped_with_nan(method):
+    random_state = np.random.RandomState(0)
+    data = random_state.standard_t(3, size=3000)
+    # The last group is small enough that its quantiles would be read
+    # from the position of its NaN, if it weren't left out.
+    groups = np.repeat(np.arange(4), [996, 1000, 1000, 4])
+    data[[5, 2999]] = np.nan
+
+    mask = processing.remove_outliers_grouped(data, groups, method=method)
+
+    assert not mask[5] and not mask[2999]
+    for group in range(4):
+        group_data = data[groups == group]
+        group_data = group_data[~np.isnan(group_data)]
+        np.testing.assert_array_equal(data[mask & (groups == group)],
+                processing.remove_outliers(group_data, method=method))
+
+@pytest.mark.parametrize('method,approx', [('std', False), ('iqr', False),
+    ('mad', True)])
+def test_remove_outliers_parallel_matches_serial_for_series(method, approx):
+    pd = pytest.importorskip('pandas')
+    data = pd.Series(make_data_with_nans(n_obs=10000, n_nans=10),
+            index=np.arange(10000) * 2, name='value')
+
+    serial = processing.remove_outliers(data, method=method, approx=approx,
+            sketch_size=20000)
+    parallel = processing.remove_outliers(data, method=method,
+            approx=approx, sketch_size=20000, n_jobs=2)
+
+    pd.testing.assert_series_equal(parallel, serial)
+
+def test_select_quantiles_of_empty_data():
+    assert np.isnan(processing.select_quantiles(np.zeros(0), 0.5))
+    quartiles = processing.select_quantiles(np.zeros((0, 3)), [0.25, 0.75],
+            axis=0)
+    assert quartiles.shape == (2, 3) and np.isnan(quartiles).all()
+
+    filtered = processing.remove_outliers(np.zeros(0), method='iqr')
+    assert filtered.shape == (0, )